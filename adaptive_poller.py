@@ -0,0 +1,181 @@
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger('adaptive_poller')
+
+
+class AdaptivePollScheduler:
+    """
+    Decides when to poll EDS for alarms and how far back each query looks
+
+    The interval drops to the minimum as soon as a poll finds new alarms or
+    the recent error rate rises, and backs off exponentially up to the
+    maximum while the plant is quiet. Each query covers the time since the
+    last successful poll plus an overlap, so no alarms are missed when the
+    interval grows or a poll fails.
+    """
+
+    def __init__(self, min_interval: float = 60, max_interval: float = 900,
+                 backoff_factor: float = 2.0, error_rate_threshold: float = 0.25,
+                 overlap_seconds: float = 60, initial_window_minutes: int = 15,
+                 error_window: int = 10):
+        """
+        Initialize the scheduler
+
+        Args:
+            min_interval: Shortest interval between polls in seconds
+            max_interval: Longest interval between polls in seconds
+            backoff_factor: Multiplier applied to the interval after a quiet poll
+            error_rate_threshold: Error rate above which polling is tightened
+            overlap_seconds: Extra time added to each query window
+            initial_window_minutes: Query window for the first poll
+            error_window: Number of recent polls used to compute the error rate
+        """
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff_factor = backoff_factor
+        self.error_rate_threshold = error_rate_threshold
+        self.overlap_seconds = overlap_seconds
+        self.initial_window_minutes = initial_window_minutes
+
+        self.interval = min_interval
+        self.first_poll_at: Optional[float] = None
+        self.last_poll_at: Optional[float] = None
+        self.last_success_at: Optional[float] = None
+        self.quiet_polls = 0
+        self._errors: Deque[bool] = deque(maxlen=error_window)
+        self._lock = threading.Lock()
+
+    def is_due(self, now: Optional[float] = None) -> bool:
+        """
+        Check whether the next poll is due
+
+        Args:
+            now: Current time as a Unix timestamp (defaults to time.time())
+
+        Returns:
+            True if a poll should run now
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            # Allow a little jitter so a timer tick at the interval boundary is not skipped
+            return self.last_poll_at is None or now - self.last_poll_at >= self.interval - 1
+
+    def window_minutes(self, now: Optional[float] = None) -> int:
+        """
+        Get the query window for a poll starting now
+
+        Args:
+            now: Current time as a Unix timestamp (defaults to time.time())
+
+        Returns:
+            Number of minutes to look back
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            if self.last_success_at is not None:
+                covered_until = self.last_success_at
+            elif self.first_poll_at is not None:
+                # Every poll so far failed: still cover the initial window of the first one
+                covered_until = self.first_poll_at - self.initial_window_minutes * 60
+            else:
+                return self.initial_window_minutes
+            elapsed = now - covered_until + self.overlap_seconds
+            return max(1, math.ceil(elapsed / 60))
+
+    def error_rate(self) -> float:
+        """
+        Get the fraction of recent polls that failed
+
+        Returns:
+            Error rate between 0 and 1
+        """
+        with self._lock:
+            return sum(self._errors) / len(self._errors) if self._errors else 0.0
+
+    def record(self, new_alarms: int, error: bool = False, now: Optional[float] = None) -> float:
+        """
+        Record the outcome of a poll and compute the next interval
+
+        Args:
+            new_alarms: Number of alarms the poll found that had not been seen before
+            error: True if the poll failed for any site; the next query window then
+                still reaches back to the last poll that succeeded everywhere
+            now: Poll start time as a Unix timestamp (defaults to time.time())
+
+        Returns:
+            Interval in seconds until the next poll
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self._errors.append(error)
+            error_rate = sum(self._errors) / len(self._errors)
+            if self.first_poll_at is None:
+                self.first_poll_at = now
+            self.last_poll_at = now
+            if not error:
+                self.last_success_at = now
+
+            previous = self.interval
+            if new_alarms > 0 or error_rate > self.error_rate_threshold:
+                self.interval = self.min_interval
+                self.quiet_polls = 0
+            else:
+                self.quiet_polls += 1
+                self.interval = min(self.interval * self.backoff_factor, self.max_interval)
+            interval = self.interval
+
+        if interval != previous:
+            logger.info(f"Poll interval changed from {previous:.0f}s to {interval:.0f}s "
+                        f"(new alarms: {new_alarms}, error rate: {error_rate:.2f})")
+        return interval
+
+    def status(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Get the current polling cadence
+
+        Args:
+            now: Current time as a Unix timestamp (defaults to time.time())
+
+        Returns:
+            Dictionary with the interval, time until next poll, quiet streak and error rate
+        """
+        now = time.time() if now is None else now
+        error_rate = self.error_rate()
+        with self._lock:
+            if self.last_poll_at is None:
+                next_poll_in = 0.0
+            else:
+                next_poll_in = max(0.0, self.last_poll_at + self.interval - now)
+            return {
+                'interval_seconds': self.interval,
+                'next_poll_in_seconds': round(next_poll_in, 1),
+                'last_poll_at': self.last_poll_at,
+                'last_success_at': self.last_success_at,
+                'quiet_polls': self.quiet_polls,
+                'error_rate': round(error_rate, 3),
+            }
+
+
+def create_poll_scheduler() -> Optional[AdaptivePollScheduler]:
+    """
+    Create an adaptive poll scheduler from environment variables
+
+    Returns:
+        AdaptivePollScheduler or None if ADAPTIVE_POLLING is not enabled
+    """
+    if os.environ.get('ADAPTIVE_POLLING', 'false').lower() != 'true':
+        return None
+
+    return AdaptivePollScheduler(
+        min_interval=float(os.environ.get('POLL_MIN_INTERVAL_SECONDS', '60')),
+        max_interval=float(os.environ.get('POLL_MAX_INTERVAL_SECONDS', '900')),
+        backoff_factor=float(os.environ.get('POLL_BACKOFF_FACTOR', '2')),
+        error_rate_threshold=float(os.environ.get('POLL_ERROR_RATE_THRESHOLD', '0.25')),
+        initial_window_minutes=int(os.environ.get('LAST_RUN_MINUTES', '15'))
+    )
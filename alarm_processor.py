@@ -1,9 +1,11 @@
-import json
 import logging
-import os
 import time
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Set
+from typing import Dict, List, Any, Optional, Tuple
+
+from contact_store import ContactStore, get_contact_store, load_env_contacts
+from suppression import SuppressionStore, get_suppression_store
+from notification_audit import NotificationAuditLog, get_audit_log
 
 logger = logging.getLogger('alarm_processor')
 
@@ -12,45 +14,79 @@ class AlarmProcessor:
     Processes alarm data and determines which alarms require SMS notifications
     """
     
-    def __init__(self, notification_threshold: int = 2, last_run_minutes: int = 15):
+    def __init__(self, notification_threshold: int = 2, last_run_minutes: int = 15,
+                 contact_store: Optional[ContactStore] = None,
+                 suppression_store: Optional[SuppressionStore] = None,
+                 renotify_minutes: float = 60, audit_log: Optional[NotificationAuditLog] = None):
         """
         Initialize the alarm processor
         
         Args:
             notification_threshold: Priority threshold for sending notifications (1 = highest)
             last_run_minutes: Time window in minutes to look for new alarms
+            contact_store: Contact directory to read contacts from (defaults to the shared store)
+            suppression_store: Maintenance windows and quiet hours (defaults to the shared store)
+            renotify_minutes: Minutes before an alarm that is still active at the same
+                priority is notified again
+            audit_log: Audit log suppressed notifications are recorded in (defaults to the shared log)
         """
         self.notification_threshold = notification_threshold
         self.last_run_minutes = last_run_minutes
         
-        # Keep track of already notified alarms to prevent duplicates
-        self.notified_alarms: Set[int] = set()
+        # Keep track of already notified alarms to prevent duplicates, keyed by
+        # (site, sid) since sids are only unique within one EDS site. EDS moves
+        # ts on every value update while a point stays in alarm, so ts is not
+        # part of the key: an alarm is notified again only when its priority
+        # changes or renotify_minutes have passed. Values are the notified
+        # priority and time.
+        self.renotify_seconds = renotify_minutes * 60
+        self.notified_alarms: Dict[Tuple[Optional[str], int], Tuple[Optional[int], float]] = {}
         
-        # Load contact list from environment variables
-        self.contacts = []
-        try:
-            contact_list_str = os.environ.get('CONTACT_LIST', '[]')
-            self.contacts = json.loads(contact_list_str)
-            logger.info(f"Loaded {len(self.contacts)} contacts for notifications")
-        except (json.JSONDecodeError, TypeError) as e:
-            logger.error(f"Error loading contact list: {str(e)}")
-            self.contacts = []
+        # Read contacts from the contact store, falling back to the
+        # CONTACT_LIST environment variable if the store is unavailable
+        self.contact_store = contact_store if contact_store is not None else get_contact_store()
+        self._env_contacts: List[Dict[str, Any]] = []
+        if self.contact_store is None:
+            self._env_contacts = load_env_contacts()
+        logger.info(f"Loaded {len(self.contacts)} contacts for notifications")
         
-    def process_alarms(self, alarms: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        self.suppression_store = suppression_store if suppression_store is not None else get_suppression_store()
+        self.audit_log = audit_log if audit_log is not None else get_audit_log()
+    
+    @property
+    def contacts(self) -> List[Dict[str, Any]]:
+        """
+        Active contacts for notifications, served from the contact store's cached view
+        """
+        if self.contact_store is not None:
+            return self.contact_store.cached_contacts()
+        return self._env_contacts
+        
+    def process_alarms(self, alarms: List[Dict[str, Any]], record_suppressed: bool = True,
+                       now: Optional[float] = None) -> List[Dict[str, Any]]:
         """
         Process alarms and determine which ones need SMS notifications
         
         Args:
             alarms: List of alarm objects from the EDS API
+            record_suppressed: Write suppressed alarms to the suppression and audit
+                logs; dry runs that send no SMS should pass False
+            now: Time of the poll as a Unix timestamp (defaults to time.time()); replays
+                pass the recorded poll time so dedupe and quiet hours behave as they did
             
         Returns:
             List of notification objects with recipient and message details
         """
         notifications = []
+        contacts = self.contacts
+        suppression = self.suppression_store.index() if self.suppression_store is not None else None
+        suppressed = []
+        now = time.time() if now is None else now
+        self._forget_notified(now)
         
         for alarm in alarms:
-            # Skip alarms we've already notified about
-            if alarm.get('sid') in self.notified_alarms:
+            # Skip alarms we've already notified about at this priority
+            if self._already_notified(alarm, now):
                 continue
                 
             # Check if alarm priority meets the threshold
@@ -58,8 +94,17 @@ class AlarmProcessor:
             if priority is None or priority > self.notification_threshold:
                 continue
             
+            # Skip alarms in a maintenance window; maintenance windows are
+            # checked at the time the alarm was raised
+            if suppression is not None:
+                window = suppression.match(alarm, alarm.get('ts') or now)
+                if window is not None:
+                    suppressed.append({'window': window, 'alarm': alarm})
+                    self._mark_notified(alarm, now)
+                    continue
+            
             # If we have contacts configured, send to all contacts
-            if self.contacts:
+            if contacts:
                 # Format the alarm timestamp
                 timestamp = alarm.get('ts')
                 if timestamp:
@@ -72,33 +117,95 @@ class AlarmProcessor:
                 message = self._format_message(alarm, formatted_time)
                 
                 # Create notifications for each contact
-                for contact in self.contacts:
+                for contact in contacts:
                     if contact.get('number'):
+                        # Quiet hours are checked at the time the SMS would be sent
+                        window = suppression.match(alarm, now, contact['number']) if suppression is not None else None
+                        if window is not None:
+                            suppressed.append({'window': window, 'alarm': alarm, 'contact': contact['number']})
+                            continue
                         notifications.append({
                             'recipient': contact['number'],
                             'message': message,
                             'alarm_id': alarm.get('sid'),
                             'priority': alarm.get('ap'),
                             'timestamp': timestamp,
+                            'site': alarm.get('site'),
                             'contact_name': contact.get('name', 'Unknown')
                         })
                 
-                # Add to notified alarms set to prevent duplicate notifications
-                sid = alarm.get('sid')
-                if sid is not None:
-                    self.notified_alarms.add(sid)
+                # Remember the occurrence to prevent duplicate notifications
+                self._mark_notified(alarm, now)
             else:
                 # Fall back to old behavior for backward compatibility
                 notification = self._prepare_notification(alarm)
-                if notification:
+                window = None
+                if notification and suppression is not None:
+                    window = suppression.match(alarm, now, notification['recipient'])
+                if window is not None:
+                    suppressed.append({'window': window, 'alarm': alarm, 'contact': notification['recipient']})
+                elif notification:
                     notifications.append(notification)
-                    
-                    # Add to notified alarms set to prevent duplicate notifications
-                    sid = alarm.get('sid')
-                    if sid is not None:
-                        self.notified_alarms.add(sid)
+                
+                if notification:
+                    # Remember the occurrence to prevent duplicate notifications
+                    self._mark_notified(alarm, now)
+        
+        if suppressed:
+            logger.info(f"Suppressed {len(suppressed)} alarm notifications by maintenance windows or quiet hours")
+        if suppressed and record_suppressed:
+            self.suppression_store.record_suppressed(suppressed)
+            if self.audit_log is not None:
+                for record in suppressed:
+                    alarm = record['alarm']
+                    self.audit_log.record(
+                        'suppressed',
+                        alarm_id=alarm.get('sid'),
+                        site=alarm.get('site'),
+                        priority=alarm.get('ap'),
+                        recipient=record.get('contact'),
+                        window=record['window']['name']
+                    )
                 
         return notifications
+    
+    def count_new(self, alarms: List[Dict[str, Any]], now: Optional[float] = None) -> int:
+        """
+        Count the alarms process_alarms has not already notified or suppressed
+        
+        Call this before process_alarms, which marks the alarms as notified.
+        
+        Args:
+            alarms: List of alarm objects from the EDS API
+            now: Time of the poll as a Unix timestamp (defaults to time.time())
+            
+        Returns:
+            Number of distinct unseen alarms
+        """
+        now = time.time() if now is None else now
+        return len({self._dedupe_key(alarm) for alarm in alarms if not self._already_notified(alarm, now)})
+    
+    @staticmethod
+    def _dedupe_key(alarm: Dict[str, Any]) -> Tuple[Optional[str], int]:
+        return (alarm.get('site'), alarm.get('sid'))
+    
+    def _already_notified(self, alarm: Dict[str, Any], now: float) -> bool:
+        entry = self.notified_alarms.get(self._dedupe_key(alarm))
+        return (entry is not None and entry[0] == alarm.get('ap')
+                and now - entry[1] < self.renotify_seconds)
+    
+    def _mark_notified(self, alarm: Dict[str, Any], now: float) -> None:
+        if alarm.get('sid') is not None:
+            self.notified_alarms[self._dedupe_key(alarm)] = (alarm.get('ap'), now)
+    
+    def _forget_notified(self, now: float) -> None:
+        """
+        Drop alarms whose re-notify cooldown has passed so the record stays bounded
+        """
+        cutoff = now - self.renotify_seconds
+        expired = [key for key, (_, notified_at) in self.notified_alarms.items() if notified_at <= cutoff]
+        for key in expired:
+            del self.notified_alarms[key]
         
     def _prepare_notification(self, alarm: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -134,7 +241,8 @@ class AlarmProcessor:
                 'message': message,
                 'alarm_id': alarm.get('sid'),
                 'priority': alarm.get('ap'),
-                'timestamp': timestamp
+                'timestamp': timestamp,
+                'site': alarm.get('site')
             }
             
         except Exception as e:
@@ -152,13 +260,14 @@ class AlarmProcessor:
             Recipient phone number or None if not found
         """
         # First, check if we have configured contacts
-        if self.contacts:
+        contacts = self.contacts
+        if contacts:
             # For now, just return the first contact's number if available
             # In a real implementation, you might want to look up the appropriate contact
             # based on alarm attributes like source (zd) or technological group (tg)
-            if len(self.contacts) > 0:
-                logger.info(f"Using contact {self.contacts[0]['name']} for alarm notification")
-                return self.contacts[0]['number']
+            if len(contacts) > 0:
+                logger.info(f"Using contact {contacts[0]['name']} for alarm notification")
+                return contacts[0]['number']
         
         # Fallback: Check if aux field contains contact info
         aux = alarm.get('aux', '')
@@ -215,4 +324,8 @@ class AlarmProcessor:
             f"ID: {alarm_id}"
         )
         
+        # Name the plant when alarms come from one of several configured EDS sites
+        if alarm.get('site') and alarm['site'] != 'default':
+            message += f"\nSite: {alarm['site']}"
+        
         return message
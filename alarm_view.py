@@ -0,0 +1,284 @@
+import base64
+import bisect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import json_codec
+
+logger = logging.getLogger('alarm_view')
+
+PRIORITY_MAP = {1: "HIGH", 2: "MEDIUM", 3: "LOW"}
+
+# Sort keys accepted by /api/alarms; prefix with "-" for descending order.
+# Every key is a tuple of JSON scalars so it can be carried in a cursor.
+SORT_FIELDS: Dict[str, Callable[[Dict[str, Any]], Tuple]] = {
+    'priority': lambda a: (a['_ap'], -a['_ts']),
+    'ts': lambda a: (a['_ts'],),
+    'name': lambda a: (str(a['name']),),
+    'source': lambda a: (str(a['source']),),
+    'site': lambda a: (str(a['site']),),
+    'quality': lambda a: (str(a['quality']),),
+}
+
+
+def sort_key(field: str, alarm: Dict[str, Any]) -> Tuple:
+    """
+    Get the total-order sort key of a formatted alarm
+
+    The site and point ID break ties, so every alarm has a unique position
+    that a cursor can refer to.
+
+    Args:
+        field: Sort field without direction
+        alarm: Formatted alarm from format_alarm
+
+    Returns:
+        Sort key tuple
+    """
+    return SORT_FIELDS[field](alarm) + (str(alarm['site']), alarm['id'] if isinstance(alarm['id'], int) else -1)
+
+
+def format_alarm(alarm: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Format an EDS alarm for the dashboard
+
+    Args:
+        alarm: Alarm object from the EDS API
+
+    Returns:
+        Display fields plus private _ts and _ap sort keys
+    """
+    ts = alarm.get('ts')
+    if ts:
+        formatted_time = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+    else:
+        formatted_time = "Unknown"
+
+    ap = alarm.get('ap')
+    return {
+        'id': alarm.get('sid'),
+        'name': alarm.get('iess', 'Unknown'),
+        'description': alarm.get('desc', ''),
+        'priority': PRIORITY_MAP.get(ap, "UNKNOWN"),
+        'value': alarm.get('value', 'N/A'),
+        'timestamp': formatted_time,
+        'quality': alarm.get('quality', 'UNKNOWN'),
+        'source': alarm.get('zd', 'Unknown'),
+        'site': alarm.get('site', ''),
+        '_ts': ts or 0,
+        '_ap': ap if isinstance(ap, int) else 99,
+    }
+
+
+def encode_cursor(view_key: str, key: Tuple) -> str:
+    """
+    Encode a paging cursor
+
+    The cursor holds the sort key of the last alarm returned rather than
+    an offset into cached data, so any worker can continue the listing.
+
+    Args:
+        view_key: Key of the sort/filter combination
+        key: Sort key (see sort_key) of the last alarm on the page
+
+    Returns:
+        Opaque URL-safe cursor string
+    """
+    raw = json_codec.dumps({'v': view_key, 'k': list(key)})
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """
+    Decode a paging cursor
+
+    Args:
+        cursor: Cursor from a previous page
+
+    Returns:
+        Dictionary with view key (v) and sort key tuple (k)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        data = json_codec.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if not isinstance(data.get('v'), str) or not isinstance(data.get('k'), list):
+            raise ValueError("bad cursor fields")
+        if not all(isinstance(value, (int, float, str)) for value in data['k']):
+            raise ValueError("bad sort key")
+        data['k'] = tuple(data['k'])
+        return data
+    except (ValueError, TypeError, AttributeError, UnicodeEncodeError) as e:
+        raise ValueError(f"Invalid cursor: {str(e)}")
+
+
+def view_key(sort: str, sources: List[str], qualities: List[str]) -> str:
+    """
+    Get the key of a sort/filter combination
+
+    Raises:
+        ValueError: If the sort field is unknown
+    """
+    field = sort.lstrip('-')
+    if field not in SORT_FIELDS:
+        raise ValueError(f"Unknown sort field: {field}")
+    return f"{sort}|{','.join(sorted(sources))}|{','.join(sorted(qualities))}"
+
+
+def page_after(view: List[Dict[str, Any]], sort: str, after: Optional[Tuple],
+               limit: int) -> Tuple[int, List[Dict[str, Any]], Optional[Tuple]]:
+    """
+    Get the page of a view that follows a cursor position (keyset paging)
+
+    Args:
+        view: Alarms in ascending sort key order (see AlarmSnapshotCache.get_view)
+        sort: Sort field, optionally prefixed with "-" for descending order
+        after: Sort key of the last alarm already returned, or None for the first page
+        limit: Page size
+
+    Returns:
+        Tuple of (offset of the page, alarms, sort key for the next cursor or None on the last page)
+    """
+    keys = [alarm['_key'] for alarm in view]
+    try:
+        if sort.startswith('-'):
+            end = len(view) if after is None else bisect.bisect_left(keys, after)
+            start = max(end - limit, 0)
+            page = view[start:end][::-1]
+            offset, more = len(view) - end, start > 0
+        else:
+            start = 0 if after is None else bisect.bisect_right(keys, after)
+            page = view[start:start + limit]
+            offset, more = start, start + limit < len(view)
+    except TypeError:
+        raise ValueError("Invalid cursor: sort key does not match the sort field")
+    return offset, page, page[-1]['_key'] if page and more else None
+
+
+class AlarmSnapshotCache:
+    """
+    Short-lived cache of formatted alarm query results used for paging
+
+    Each worker keeps the latest result of each query for ttl seconds, so
+    paging, sorting and filtering do not query EDS again. Cursors are
+    keyset positions, not references to a cached result, so a page can be
+    served by any worker. When a result expires, concurrent requests for
+    the same query share one refresh (single-flight).
+    """
+
+    def __init__(self, ttl: float = 30.0, max_snapshots: int = 32):
+        """
+        Initialize the cache
+
+        Args:
+            ttl: Seconds a query result is reused for
+            max_snapshots: Maximum number of query results kept
+        """
+        self.ttl = ttl
+        self.max_snapshots = max_snapshots
+        self._lock = threading.Lock()
+        self._snapshots: 'OrderedDict[Tuple, Dict[str, Any]]' = OrderedDict()
+        self._refreshing: Dict[Tuple, Future] = {}
+
+    def get_snapshot(self, query_key: Tuple, fetch: Callable[[], List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Get the current result of a query, fetching it if missing or expired
+
+        Args:
+            query_key: Hashable key of the EDS query (e.g. minutes and priorities)
+            fetch: Function returning raw alarms when a new snapshot is needed
+
+        Returns:
+            Snapshot with created_at, alarms and cached views
+        """
+        with self._lock:
+            snapshot = self._snapshots.get(query_key)
+            if snapshot is not None and time.monotonic() - snapshot['created_at'] < self.ttl:
+                self._snapshots.move_to_end(query_key)
+                return snapshot
+            future = self._refreshing.get(query_key)
+            leader = future is None
+            if leader:
+                future = self._refreshing[query_key] = Future()
+
+        if not leader:
+            # Another request is already fetching this query; share its result
+            return future.result()
+
+        # Fetch outside the lock so slow EDS queries do not block other listings
+        try:
+            alarms = [format_alarm(alarm) for alarm in fetch()]
+            snapshot = {'created_at': time.monotonic(), 'alarms': alarms, 'views': {}}
+            with self._lock:
+                self._snapshots[query_key] = snapshot
+                self._snapshots.move_to_end(query_key)
+                while len(self._snapshots) > self.max_snapshots:
+                    self._snapshots.popitem(last=False)
+            future.set_result(snapshot)
+            return snapshot
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._refreshing[query_key]
+
+    def get_view(self, snapshot: Dict[str, Any], sort: str, sources: List[str],
+                 qualities: List[str]) -> List[Dict[str, Any]]:
+        """
+        Get the filtered alarms of a snapshot in ascending sort key order
+
+        Each alarm carries its sort key as "_key"; descending listings are
+        read from the end (see page_after).
+
+        Args:
+            snapshot: Snapshot from get_snapshot
+            sort: Sort field, optionally prefixed with "-" for descending order
+            sources: Only include alarms from these sources (zd), empty for all
+            qualities: Only include alarms with these qualities, empty for all
+
+        Returns:
+            Alarms sorted by sort key
+
+        Raises:
+            ValueError: If the sort field is unknown
+        """
+        key = view_key(sort.lstrip('-'), sources, qualities)
+        with self._lock:
+            view = snapshot['views'].get(key)
+        if view is not None:
+            return view
+
+        field = sort.lstrip('-')
+        source_set = set(sources)
+        quality_set = {q.upper() for q in qualities}
+        view = [
+            dict(alarm, _key=sort_key(field, alarm)) for alarm in snapshot['alarms']
+            if (not source_set or alarm['source'] in source_set)
+            and (not quality_set or str(alarm['quality']).upper() in quality_set)
+        ]
+        view.sort(key=lambda alarm: alarm['_key'])
+
+        with self._lock:
+            snapshot['views'][key] = view
+        return view
+
+
+def public_fields(alarm: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Strip private sort keys from a formatted alarm
+
+    Args:
+        alarm: Formatted alarm from format_alarm
+
+    Returns:
+        Alarm without keys starting with an underscore
+    """
+    return {key: value for key, value in alarm.items() if not key.startswith('_')}
@@ -0,0 +1,80 @@
+import argparse
+import random
+import timeit
+from typing import Any, Dict, List
+
+import json_codec
+
+
+def make_points_payload(count: int, seed: int = 42) -> Dict[str, Any]:
+    """
+    Build a points/query response shaped like real EDS alarm data
+
+    Args:
+        count: Number of points
+        seed: Random seed so runs are comparable
+
+    Returns:
+        Response body with a points list
+    """
+    rng = random.Random(seed)
+    sources = ['NORTH', 'SOUTH', 'WTP1', 'PUMPSTN', 'SUBSTATION']
+    points: List[Dict[str, Any]] = []
+    for sid in range(count):
+        points.append({
+            'sid': 100000 + sid,
+            'iess': f"{rng.choice(sources)}.P{sid:05d}.ALM",
+            'desc': f"Pump {sid % 40} discharge pressure high alarm",
+            'value': round(rng.uniform(0, 1000), 3),
+            'ts': 1700000000 + rng.randint(0, 86400),
+            'ap': rng.choice([1, 2, 2, 3, 3, 3]),
+            'quality': rng.choice(['GOOD', 'GOOD', 'GOOD', 'FAIR']),
+            'aux': '' if rng.random() < 0.8 else 'contact:+6421000000;details:shift',
+            'zd': rng.choice(sources),
+        })
+    return {'points': points}
+
+
+def benchmark(payload: Dict[str, Any], repeat: int) -> Dict[str, Dict[str, float]]:
+    """
+    Time encoding and decoding of a payload with every installed backend
+
+    Args:
+        payload: Object to encode and decode
+        repeat: Number of iterations per measurement
+
+    Returns:
+        Dictionary of backend name to encode/decode time per call in milliseconds
+    """
+    results = {}
+    for name, factory in json_codec.BACKENDS.items():
+        try:
+            encode, decode = factory()
+        except ImportError:
+            continue
+        encoded = encode(payload)
+        encode_s = min(timeit.repeat(lambda: encode(payload), number=repeat, repeat=3)) / repeat
+        decode_s = min(timeit.repeat(lambda: decode(encoded), number=repeat, repeat=3)) / repeat
+        results[name] = {
+            'encode_ms': encode_s * 1000,
+            'decode_ms': decode_s * 1000,
+            'size_kb': len(encoded) / 1024,
+        }
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare JSON backends on EDS points payloads')
+    parser.add_argument('--points', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"Active backend: {json_codec.BACKEND}")
+    print(f"{'points':>7} {'backend':>8} {'size KB':>9} {'encode ms':>10} {'decode ms':>10} {'vs stdlib':>10}")
+    for count in args.points:
+        results = benchmark(make_points_payload(count), args.repeat)
+        baseline = results['stdlib']['encode_ms'] + results['stdlib']['decode_ms']
+        for name, result in results.items():
+            speedup = baseline / (result['encode_ms'] + result['decode_ms'])
+            print(f"{count:>7} {name:>8} {result['size_kb']:>9.1f} {result['encode_ms']:>10.3f} "
+                  f"{result['decode_ms']:>10.3f} {speedup:>9.1f}x")
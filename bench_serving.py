@@ -0,0 +1,94 @@
+import argparse
+import statistics
+import threading
+import time
+from typing import Dict, List
+
+import requests
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    """
+    Get a percentile from a list of values
+
+    Args:
+        values: Sample values
+        pct: Percentile between 0 and 100
+
+    Returns:
+        Value at the requested percentile
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(pct / 100.0 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def run_benchmark(url: str, concurrency: int, duration: float) -> Dict[str, float]:
+    """
+    Hit a dashboard endpoint from concurrent simulated viewers
+
+    Args:
+        url: Full URL to request
+        concurrency: Number of concurrent viewers
+        duration: Benchmark duration in seconds
+
+    Returns:
+        Summary with throughput, latency percentiles, error count and error rate
+    """
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def viewer() -> None:
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                response = session.get(url, timeout=60)
+                ok = response.status_code < 500
+            except requests.exceptions.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - start
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors[0] += 1
+
+    threads = [threading.Thread(target=viewer, daemon=True) for _ in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed_total = time.monotonic() - started
+
+    total = len(latencies) + errors[0]
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'error_rate': errors[0] / total if total else 0.0,
+        'throughput_rps': len(latencies) / elapsed_total if elapsed_total else 0.0,
+        'latency_mean_ms': statistics.mean(latencies) * 1000 if latencies else 0.0,
+        'latency_p50_ms': _percentile(latencies, 50) * 1000,
+        'latency_p95_ms': _percentile(latencies, 95) * 1000,
+        'latency_p99_ms': _percentile(latencies, 99) * 1000,
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Capacity benchmark for the web dashboard')
+    parser.add_argument('--url', default='http://127.0.0.1:5000/api/alarms?minutes=60')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 50, 100, 200])
+    parser.add_argument('--duration', type=float, default=20.0)
+    args = parser.parse_args()
+
+    print(f"{'viewers':>8} {'req/s':>8} {'mean ms':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'error %':>8}")
+    for level in args.concurrency:
+        result = run_benchmark(args.url, level, args.duration)
+        print(f"{level:>8} {result['throughput_rps']:>8.1f} {result['latency_mean_ms']:>8.1f} "
+              f"{result['latency_p50_ms']:>8.1f} {result['latency_p95_ms']:>8.1f} "
+              f"{result['latency_p99_ms']:>8.1f} {result['errors']:>7} {result['error_rate']:>8.2%}")
@@ -0,0 +1,391 @@
+import json
+import logging
+import math
+import os
+import socket
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('canary')
+
+# Rolling windows reported for every canary target
+WINDOWS = {'5m': 300, '1h': 3600}
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    """
+    Nearest-rank percentile of a sorted list
+
+    Args:
+        values: Sorted values
+        pct: Percentile between 0 and 100
+
+    Returns:
+        Percentile value or None if there are no values
+    """
+    if not values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(values)) - 1, 0)
+    return values[rank]
+
+
+class LatencyTracker:
+    """
+    Rolling record of canary results for one target
+    """
+
+    def __init__(self, max_age: float = 3600):
+        """
+        Initialize the tracker
+
+        Args:
+            max_age: Seconds results are kept for
+        """
+        self.max_age = max_age
+        self._samples: Deque[Tuple[float, bool, float]] = deque()
+
+    def record(self, ok: bool, latency_ms: float, now: Optional[float] = None) -> None:
+        """
+        Record one check result
+
+        Args:
+            ok: Whether the check succeeded
+            latency_ms: Round trip time in milliseconds
+            now: Time of the check (defaults to time.time())
+        """
+        now = time.time() if now is None else now
+        self._samples.append((now, ok, latency_ms))
+        while self._samples and self._samples[0][0] < now - self.max_age:
+            self._samples.popleft()
+
+    def summary(self, window: float, now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Summarise the results of a rolling window
+
+        Latency percentiles only include successful checks.
+
+        Args:
+            window: Window length in seconds
+            now: End of the window (defaults to time.time())
+
+        Returns:
+            Sample count, availability and p50/p95/p99 latency in milliseconds
+        """
+        now = time.time() if now is None else now
+        samples = [s for s in self._samples if s[0] >= now - window]
+        latencies = sorted(s[2] for s in samples if s[1])
+        return {
+            'samples': len(samples),
+            'availability': round(len(latencies) / len(samples), 4) if samples else None,
+            'p50_ms': _percentile(latencies, 50),
+            'p95_ms': _percentile(latencies, 95),
+            'p99_ms': _percentile(latencies, 99),
+        }
+
+
+class SyntheticCanary:
+    """
+    Background end-to-end checks of the EDS and TNZ APIs with SLO alerting
+
+    Every interval the canary pings each EDS site (logging in if needed)
+    and sends a ValidateOnly SMS through TNZ, which exercises the API and
+    credentials without delivering a message. Results are kept in rolling
+    windows so status pages can be served from memory. When a target's
+    availability or p95 latency breaks its SLO, an alert is logged and sent
+    by SMS, and repeated while the breach lasts at most once per cooldown.
+
+    With a lease backend only the process holding the "canary" lease runs
+    checks and sends alerts. It writes its status to status_path after every
+    round, and the other processes serve that file instead of their own
+    (empty) results.
+    """
+
+    def __init__(self, get_eds_poller: Callable, get_tnz_client: Callable,
+                 get_recipient: Callable[[], Optional[str]], interval: float = 60,
+                 slo_availability: float = 0.95, slo_p95_ms: float = 3000,
+                 slo_window: float = 900, min_samples: int = 5,
+                 alert_numbers: Optional[List[str]] = None, alert_cooldown: float = 1800,
+                 lease_backend=None, owner: Optional[str] = None, status_path: Optional[str] = None):
+        """
+        Initialize the canary
+
+        Args:
+            get_eds_poller: Function returning the shared EDSFanoutPoller or None
+            get_tnz_client: Function returning the shared TNZClient or None
+            get_recipient: Function returning the number used for ValidateOnly sends
+            interval: Seconds between checks
+            slo_availability: Minimum fraction of successful checks
+            slo_p95_ms: Maximum p95 latency of successful checks in milliseconds
+            slo_window: Window in seconds the SLOs are evaluated over
+            min_samples: Minimum checks in the window before an SLO can be breached
+            alert_numbers: Numbers that receive SLO breach alerts by SMS
+            alert_cooldown: Minimum seconds between repeated alerts for one target
+            lease_backend: LeaseBackend electing the one process that runs checks, or None
+                to run them in every process
+            owner: Identifier of this process for the lease (defaults to host name and pid)
+            status_path: File the lease holder shares its status through, or None
+        """
+        self.get_eds_poller = get_eds_poller
+        self.get_tnz_client = get_tnz_client
+        self.get_recipient = get_recipient
+        self.interval = interval
+        self.slo_availability = slo_availability
+        self.slo_p95_ms = slo_p95_ms
+        self.slo_window = slo_window
+        self.min_samples = min_samples
+        self.alert_numbers = alert_numbers or []
+        self.alert_cooldown = alert_cooldown
+        self.lease_backend = lease_backend
+        self.owner = owner or f"{socket.gethostname()}-{os.getpid()}"
+        self.status_path = status_path
+        self.is_leader = lease_backend is None
+
+        self.last_run: Optional[float] = None
+        self._max_age = max(max(WINDOWS.values()), slo_window)
+        self._trackers: Dict[str, LatencyTracker] = {}
+        self._last: Dict[str, Dict[str, Any]] = {}
+        self._breaches: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _check(self, target: str, probe: Callable[[], Tuple[bool, Optional[str]]]) -> None:
+        started = time.perf_counter()
+        try:
+            ok, error = probe()
+        except Exception as e:
+            ok, error = False, str(e)
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        now = time.time()
+
+        with self._lock:
+            tracker = self._trackers.setdefault(target, LatencyTracker(self._max_age))
+            tracker.record(ok, latency_ms, now)
+            self._last[target] = {'ok': ok, 'error': error, 'latency_ms': latency_ms, 'checked_at': now}
+
+        if not ok:
+            logger.warning(f"Canary check {target} failed after {latency_ms}ms: {error or 'unknown error'}")
+
+    def _probe_tnz(self, tnz_client, recipient: str) -> Tuple[bool, Optional[str]]:
+        ok = tnz_client.send_sms(to=recipient, message='EDS alarm canary', reference='canary', validate_only=True)
+        return ok, None if ok else 'validate send failed'
+
+    def run_once(self) -> None:
+        """
+        Run one round of checks and evaluate the SLOs
+        """
+        eds_poller = self.get_eds_poller()
+        if eds_poller is not None:
+            for name in eds_poller.clients:
+                self._check(f"eds:{name}", lambda name=name: eds_poller.ping_site(name))
+
+        tnz_client = self.get_tnz_client()
+        recipient = self.get_recipient()
+        if tnz_client is not None and recipient:
+            self._check('tnz', lambda: self._probe_tnz(tnz_client, recipient))
+
+        self.last_run = time.time()
+        self._evaluate_slos()
+
+    def _evaluate_slos(self) -> None:
+        now = time.time()
+        alerts = []
+
+        with self._lock:
+            for target, tracker in self._trackers.items():
+                summary = tracker.summary(self.slo_window, now)
+                reasons = []
+                if summary['samples'] >= self.min_samples:
+                    if summary['availability'] < self.slo_availability:
+                        reasons.append(f"availability {summary['availability']:.1%} < {self.slo_availability:.1%}")
+                    if summary['p95_ms'] is not None and summary['p95_ms'] > self.slo_p95_ms:
+                        reasons.append(f"p95 {summary['p95_ms']:.0f}ms > {self.slo_p95_ms:.0f}ms")
+
+                breach = self._breaches.get(target)
+                if reasons:
+                    if breach is None:
+                        breach = self._breaches[target] = {'since': now, 'alerted_at': None}
+                    breach['reasons'] = reasons
+                    if breach['alerted_at'] is None or now - breach['alerted_at'] >= self.alert_cooldown:
+                        breach['alerted_at'] = now
+                        alerts.append(f"EDS alarm system SLO breach: {target} {'; '.join(reasons)}")
+                elif breach is not None:
+                    del self._breaches[target]
+                    logger.info(f"Canary SLO recovered for {target}")
+
+        for message in alerts:
+            self._alert(message)
+
+    def _alert(self, message: str) -> None:
+        logger.error(message)
+        if not self.alert_numbers:
+            return
+        tnz_client = self.get_tnz_client()
+        if tnz_client is None:
+            logger.error("Cannot send canary alert: TNZ API key not configured")
+            return
+        for number in self.alert_numbers:
+            tnz_client.send_sms(to=number, message=message, reference='canary-alert')
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Get the latest canary results without running any checks
+
+        Processes that do not hold the lease return the lease holder's
+        published status, or their own empty status if there is none yet.
+
+        Returns:
+            Last run time, SLOs and per-target last result, rolling windows and breach state
+        """
+        if not self.is_leader and self.status_path:
+            published = self._read_status()
+            if published is not None:
+                return published
+
+        now = time.time()
+        with self._lock:
+            targets = {}
+            for target, tracker in self._trackers.items():
+                breach = self._breaches.get(target)
+                targets[target] = dict(
+                    self._last.get(target, {}),
+                    windows={label: tracker.summary(seconds, now) for label, seconds in WINDOWS.items()},
+                    slo_breached=breach is not None,
+                    slo_breach_reasons=breach['reasons'] if breach else [],
+                )
+        return {
+            'last_run': self.last_run,
+            'interval': self.interval,
+            'slo': {
+                'availability': self.slo_availability,
+                'p95_ms': self.slo_p95_ms,
+                'window_seconds': self.slo_window,
+            },
+            'targets': targets,
+        }
+
+    def _read_status(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.status_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading canary status from {self.status_path}: {str(e)}")
+            return None
+
+    def _publish_status(self) -> None:
+        # Written to a temporary file and renamed so readers never see a partial file
+        tmp_path = f"{self.status_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.status(), f)
+            os.replace(tmp_path, self.status_path)
+        except OSError as e:
+            logger.error(f"Error writing canary status to {self.status_path}: {str(e)}")
+
+    def _acquire_lease(self) -> bool:
+        if self.lease_backend is None:
+            return True
+        # The lease outlives a few missed rounds before another process takes over
+        was_leader = self.is_leader
+        self.is_leader = self.lease_backend.try_acquire('canary', self.owner, self.interval * 3)
+        if self.is_leader != was_leader:
+            logger.info(f"Canary {'started' if self.is_leader else 'stopped'} running checks in {self.owner}")
+        return self.is_leader
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                if self._acquire_lease():
+                    self.run_once()
+                    if self.lease_backend is not None and self.status_path:
+                        self._publish_status()
+            except Exception as e:
+                logger.error(f"Error running canary: {str(e)}")
+            self._stop.wait(self.interval)
+
+    def start(self) -> None:
+        """
+        Start running checks in a background thread
+        """
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='canary', daemon=True)
+            self._thread.start()
+            logger.info(f"Canary started, checking every {self.interval}s")
+
+    def stop(self) -> None:
+        """
+        Stop the background thread after the current round of checks
+
+        The lease is released so another process takes over the checks.
+        """
+        self._stop.set()
+        if self.lease_backend is not None and self.is_leader:
+            self.lease_backend.release('canary', self.owner)
+            self.is_leader = False
+
+
+_canary: Optional[SyntheticCanary] = None
+_canary_lock = threading.Lock()
+
+
+def _canary_recipient() -> Optional[str]:
+    """
+    Get the number used for ValidateOnly canary sends
+
+    Returns:
+        CANARY_SMS_NUMBER, else the first active contact, else None
+    """
+    number = os.environ.get('CANARY_SMS_NUMBER')
+    if number:
+        return number
+
+    from contact_store import get_contact_store
+
+    store = get_contact_store()
+    contacts = store.cached_contacts() if store else []
+    return contacts[0]['number'] if contacts else None
+
+
+def get_canary() -> Optional[SyntheticCanary]:
+    """
+    Get the process-wide canary, creating and starting it on first use
+
+    The canary is opt-in: set CANARY_INTERVAL_SECONDS to enable it. With a
+    COORDINATION_BACKEND only one process across all web workers and
+    instances sharing the backend runs the checks.
+
+    Returns:
+        Running SyntheticCanary or None if CANARY_INTERVAL_SECONDS is unset or 0
+    """
+    global _canary
+
+    interval = float(os.environ.get('CANARY_INTERVAL_SECONDS', '0'))
+    if interval <= 0:
+        return None
+
+    with _canary_lock:
+        if _canary is None:
+            from coordination import create_lease_backend
+            from shared_clients import get_eds_poller, get_tnz_client
+
+            alert_numbers = [n.strip() for n in os.environ.get('CANARY_ALERT_NUMBERS', '').split(',') if n.strip()]
+            _canary = SyntheticCanary(
+                get_eds_poller=get_eds_poller,
+                get_tnz_client=get_tnz_client,
+                get_recipient=_canary_recipient,
+                interval=interval,
+                slo_availability=float(os.environ.get('CANARY_SLO_AVAILABILITY', '0.95')),
+                slo_p95_ms=float(os.environ.get('CANARY_SLO_P95_MS', '3000')),
+                slo_window=float(os.environ.get('CANARY_SLO_WINDOW_SECONDS', '900')),
+                alert_numbers=alert_numbers,
+                alert_cooldown=float(os.environ.get('CANARY_ALERT_COOLDOWN_SECONDS', '1800')),
+                lease_backend=create_lease_backend(),
+                status_path=os.environ.get('CANARY_STATUS_PATH', 'canary_status.json')
+            )
+            _canary.start()
+        return _canary
@@ -0,0 +1,77 @@
+import gzip
+import logging
+
+logger = logging.getLogger('compression')
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this are sent uncompressed
+MIN_SIZE = 1024
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/html', 'text/css', 'application/javascript', 'text/plain')
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    encodings = set()
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.partition(';')
+        name = name.strip().lower()
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            encodings.add(name)
+    return encodings
+
+
+def compress_response(response, accept_encoding: str, level: int = 6):
+    """
+    Compress a Flask response with brotli or gzip if the client accepts it
+
+    Brotli is used when the brotli package is installed and the client
+    accepts it; otherwise gzip.
+
+    Args:
+        response: Flask response object
+        accept_encoding: Value of the request's Accept-Encoding header
+        level: gzip compression level
+
+    Returns:
+        The same response, compressed in place when applicable
+    """
+    if (response.direct_passthrough
+            or response.status_code < 200 or response.status_code >= 300
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    accepted = _accepted_encodings(accept_encoding)
+    if 'br' in accepted and brotli is not None:
+        encoding = 'br'
+    elif 'gzip' in accepted:
+        encoding = 'gzip'
+    else:
+        return response
+
+    data = response.get_data()
+    if len(data) < MIN_SIZE:
+        return response
+
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=5)
+    else:
+        compressed = gzip.compress(data, compresslevel=level)
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    response.headers['Content-Length'] = str(len(compressed))
+    return response
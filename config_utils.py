@@ -0,0 +1,16 @@
+from typing import Any
+
+
+def parse_bool(value: Any) -> bool:
+    """
+    Interpret a flag from JSON, CSV or environment configuration
+
+    Args:
+        value: Boolean, or a string/number such as 'true', 'yes', 'on' or 1
+
+    Returns:
+        True if the value is a recognised true flag, False otherwise
+    """
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y', 'on')
@@ -0,0 +1,483 @@
+import csv
+import io
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config_utils import parse_bool
+
+logger = logging.getLogger('contact_store')
+
+CONTACT_FIELDS = ('id', 'name', 'number', 'contact_group', 'on_call', 'active')
+
+
+def normalize_number(number: str, default_country_code: str = '64') -> str:
+    """
+    Normalise a phone number to E.164 format
+
+    Accepts numbers with spaces, dashes, dots or brackets. Numbers starting
+    with 00 are treated as international, numbers starting with a single 0
+    as national numbers in the default country.
+
+    Args:
+        number: Phone number as entered
+        default_country_code: Country calling code for national numbers
+
+    Returns:
+        Number in E.164 format, e.g. +6421234567
+
+    Raises:
+        ValueError: If the number cannot be normalised
+    """
+    if number is None:
+        raise ValueError("Phone number is required")
+
+    cleaned = re.sub(r'[\s\-().]', '', str(number))
+    if cleaned.startswith('+'):
+        digits = cleaned[1:]
+    elif cleaned.startswith('00'):
+        digits = cleaned[2:]
+    elif cleaned.startswith('0'):
+        digits = default_country_code + cleaned[1:]
+    else:
+        digits = cleaned
+
+    if not digits.isdigit() or not 8 <= len(digits) <= 15:
+        raise ValueError(f"Invalid phone number: {number}")
+    return f"+{digits}"
+
+
+class ContactStore:
+    """
+    SQLite-backed contact directory for SMS notifications
+
+    Numbers are stored in E.164 format and are unique, so writing a contact
+    with a number that already exists updates that contact instead of
+    adding a duplicate.
+    """
+
+    def __init__(self, path: str, default_country_code: str = '64', cache_seconds: float = 30.0):
+        """
+        Initialize the contact store
+
+        Args:
+            path: Path to the SQLite database file
+            default_country_code: Country calling code for national numbers
+            cache_seconds: How long cached_contacts may serve a stale view written by another process
+        """
+        self.path = path
+        self.default_country_code = default_country_code
+        self.cache_seconds = cache_seconds
+        self._lock = threading.Lock()
+        self._cache: Optional[List[Dict[str, Any]]] = None
+        self._cache_loaded_at = 0.0
+
+        with self._connect() as conn:
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS contacts ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " name TEXT NOT NULL,"
+                " number TEXT NOT NULL,"
+                " contact_group TEXT,"
+                " on_call INTEGER NOT NULL DEFAULT 0,"
+                " active INTEGER NOT NULL DEFAULT 1,"
+                " updated_at REAL NOT NULL);"
+                "CREATE UNIQUE INDEX IF NOT EXISTS idx_contacts_number ON contacts (number);"
+                "CREATE INDEX IF NOT EXISTS idx_contacts_group ON contacts (contact_group);"
+                "CREATE INDEX IF NOT EXISTS idx_contacts_on_call ON contacts (on_call, active);"
+                "CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT);"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Open a connection that commits on success and is always closed
+        """
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _invalidate(self) -> None:
+        with self._lock:
+            self._cache = None
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        contact = {field: row[field] for field in CONTACT_FIELDS}
+        contact['on_call'] = bool(contact['on_call'])
+        contact['active'] = bool(contact['active'])
+        return contact
+
+    def add_contact(self, name: str, number: str, contact_group: str = None,
+                    on_call: bool = False, active: bool = True) -> Dict[str, Any]:
+        """
+        Add a contact, or update the existing contact with the same number
+
+        Args:
+            name: Contact name
+            number: Phone number in any supported format
+            contact_group: Optional group used for routing
+            on_call: Whether the contact is currently on call
+            active: Whether the contact receives notifications
+
+        Returns:
+            The stored contact
+
+        Raises:
+            ValueError: If the name is empty or the number is invalid
+        """
+        name, number = self._validate(name, number)
+        with self._connect() as conn:
+            row = self._upsert(conn, name, number, contact_group, on_call, active)
+        self._invalidate()
+        return self._to_dict(row)
+
+    def _validate(self, name: str, number: str) -> Tuple[str, str]:
+        """
+        Check a contact's name and normalise its number
+
+        Returns:
+            Tuple of (stripped name, E.164 number)
+
+        Raises:
+            ValueError: If the name is empty or the number is invalid
+        """
+        name = (name or '').strip()
+        if not name:
+            raise ValueError("Contact name is required")
+        return name, normalize_number(number, self.default_country_code)
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, name: str, number: str, contact_group: Optional[str],
+                on_call: bool, active: bool) -> sqlite3.Row:
+        conn.execute(
+            "INSERT INTO contacts (name, number, contact_group, on_call, active, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(number) DO UPDATE SET name = excluded.name, "
+            "contact_group = excluded.contact_group, on_call = excluded.on_call, "
+            "active = excluded.active, updated_at = excluded.updated_at",
+            (name, number, contact_group or None, int(on_call), int(active), time.time())
+        )
+        return conn.execute("SELECT * FROM contacts WHERE number = ?", (number,)).fetchone()
+
+    def get_contact(self, contact_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Get a contact by ID
+
+        Args:
+            contact_id: Contact ID
+
+        Returns:
+            Contact or None if not found
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM contacts WHERE id = ?", (contact_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def find_by_number(self, number: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a contact by phone number
+
+        Args:
+            number: Phone number in any supported format
+
+        Returns:
+            Contact or None if not found or the number is invalid
+        """
+        try:
+            number = normalize_number(number, self.default_country_code)
+        except ValueError:
+            return None
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM contacts WHERE number = ?", (number,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list_contacts(self, contact_group: str = None, on_call: bool = None,
+                      active: bool = None) -> List[Dict[str, Any]]:
+        """
+        List contacts, optionally filtered by group, on-call status and active flag
+
+        Args:
+            contact_group: Only return contacts in this group
+            on_call: Only return contacts with this on-call status
+            active: Only return contacts with this active flag
+
+        Returns:
+            List of contacts ordered by name
+        """
+        clauses = []
+        params: List[Any] = []
+        if contact_group is not None:
+            clauses.append("contact_group = ?")
+            params.append(contact_group)
+        if on_call is not None:
+            clauses.append("on_call = ?")
+            params.append(int(on_call))
+        if active is not None:
+            clauses.append("active = ?")
+            params.append(int(active))
+
+        query = "SELECT * FROM contacts"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY name, id"
+
+        with self._connect() as conn:
+            rows = conn.execute(query, params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def update_contact(self, contact_id: int, **fields) -> Optional[Dict[str, Any]]:
+        """
+        Update fields of a contact
+
+        Args:
+            contact_id: Contact ID
+            **fields: Any of name, number, contact_group, on_call, active
+
+        Returns:
+            The updated contact or None if not found
+
+        Raises:
+            ValueError: If a field is invalid or the number belongs to another contact
+        """
+        updates = {}
+        for key, value in fields.items():
+            if key == 'name':
+                value = (value or '').strip()
+                if not value:
+                    raise ValueError("Contact name is required")
+            elif key == 'number':
+                value = normalize_number(value, self.default_country_code)
+            elif key in ('on_call', 'active'):
+                value = int(parse_bool(value))
+            elif key == 'contact_group':
+                value = value or None
+            else:
+                raise ValueError(f"Unknown contact field: {key}")
+            updates[key] = value
+
+        if not updates:
+            return self.get_contact(contact_id)
+
+        assignments = ", ".join(f"{key} = ?" for key in updates)
+        try:
+            with self._connect() as conn:
+                cursor = conn.execute(
+                    f"UPDATE contacts SET {assignments}, updated_at = ? WHERE id = ?",
+                    list(updates.values()) + [time.time(), contact_id]
+                )
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Number {updates.get('number')} belongs to another contact")
+        self._invalidate()
+        return self.get_contact(contact_id) if cursor.rowcount else None
+
+    def delete_contact(self, contact_id: int) -> bool:
+        """
+        Delete a contact
+
+        Args:
+            contact_id: Contact ID
+
+        Returns:
+            True if the contact was deleted, False if not found
+        """
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM contacts WHERE id = ?", (contact_id,))
+        self._invalidate()
+        return cursor.rowcount > 0
+
+    def replace_all(self, contacts: Iterable[Dict[str, Any]]) -> int:
+        """
+        Make the store contain exactly the given contacts
+
+        Existing contacts are matched by number, so their IDs, groups and
+        on-call status are kept unless the given contact sets them. Every
+        contact is validated before anything is written, and the store is
+        replaced in one transaction, so an invalid contact changes nothing.
+
+        Args:
+            contacts: Contacts with at least name and number
+
+        Returns:
+            Number of contacts stored
+
+        Raises:
+            ValueError: If a contact is invalid
+        """
+        contacts = [(contact, *self._validate(contact.get('name'), contact.get('number'))) for contact in contacts]
+
+        keep_ids = []
+        with self._connect() as conn:
+            for contact, name, number in contacts:
+                existing = conn.execute("SELECT * FROM contacts WHERE number = ?", (number,)).fetchone()
+                row = self._upsert(
+                    conn, name, number,
+                    contact_group=contact.get('contact_group', existing['contact_group'] if existing else None),
+                    on_call=parse_bool(contact.get('on_call', existing['on_call'] if existing else False)),
+                    active=parse_bool(contact.get('active', existing['active'] if existing else True))
+                )
+                keep_ids.append(row['id'])
+            if keep_ids:
+                placeholders = ", ".join("?" for _ in keep_ids)
+                conn.execute(f"DELETE FROM contacts WHERE id NOT IN ({placeholders})", keep_ids)
+            else:
+                conn.execute("DELETE FROM contacts")
+        self._invalidate()
+        return len(keep_ids)
+
+    def import_csv(self, text: str) -> Dict[str, Any]:
+        """
+        Bulk import contacts from CSV text
+
+        The CSV needs a header row with name and number columns and may
+        include contact_group (or group), on_call and active columns. Rows
+        with a number that already exists update that contact.
+
+        Args:
+            text: CSV content
+
+        Returns:
+            Dictionary with the number of rows imported and a list of row errors
+        """
+        reader = csv.DictReader(io.StringIO(text))
+        imported = 0
+        errors = []
+        for line_number, row in enumerate(reader, start=2):
+            # Values of columns beyond the header are collected under the None key; ignore them
+            row = {k.strip().lower(): (v or '').strip() for k, v in row.items() if k is not None}
+            try:
+                self.add_contact(
+                    name=row.get('name'),
+                    number=row.get('number'),
+                    contact_group=row.get('contact_group') or row.get('group'),
+                    on_call=parse_bool(row.get('on_call', '')),
+                    active=parse_bool(row['active']) if row.get('active') else True
+                )
+                imported += 1
+            except ValueError as e:
+                errors.append({'line': line_number, 'error': str(e)})
+
+        logger.info(f"Imported {imported} contacts from CSV with {len(errors)} errors")
+        return {'imported': imported, 'errors': errors}
+
+    def seed(self, contacts: Iterable[Dict[str, Any]]) -> int:
+        """
+        Import initial contacts once in the life of the database
+
+        The first call imports the contacts if the store is empty and records
+        that seeding happened, so contacts deleted later are not re-imported.
+
+        Args:
+            contacts: Contacts with name and number
+
+        Returns:
+            Number of contacts imported
+        """
+        imported = 0
+        with self._connect() as conn:
+            if conn.execute("SELECT 1 FROM store_meta WHERE key = 'seeded'").fetchone():
+                return 0
+            if not conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]:
+                for contact in contacts:
+                    try:
+                        name, number = self._validate(contact.get('name'), contact.get('number'))
+                    except ValueError as e:
+                        logger.warning(f"Skipping seed contact: {str(e)}")
+                        continue
+                    self._upsert(conn, name, number, None, False, True)
+                    imported += 1
+            conn.execute("INSERT INTO store_meta (key, value) VALUES ('seeded', ?)", (str(time.time()),))
+        self._invalidate()
+        return imported
+
+    def count(self) -> int:
+        """
+        Count stored contacts
+
+        Returns:
+            Number of contacts
+        """
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+
+    def cached_contacts(self) -> List[Dict[str, Any]]:
+        """
+        Get the active contacts from an in-memory cache
+
+        The cache is refreshed after writes through this store and at most
+        cache_seconds after writes by other processes.
+
+        Returns:
+            List of active contacts
+        """
+        with self._lock:
+            fresh = time.monotonic() - self._cache_loaded_at < self.cache_seconds
+            if self._cache is not None and fresh:
+                return self._cache
+
+        contacts = self.list_contacts(active=True)
+        with self._lock:
+            self._cache = contacts
+            self._cache_loaded_at = time.monotonic()
+        return contacts
+
+
+def load_env_contacts() -> List[Dict[str, Any]]:
+    """
+    Load contacts from the legacy CONTACT_LIST environment variable
+
+    Returns:
+        List of contacts, empty if the variable is missing or invalid
+    """
+    try:
+        contacts = json.loads(os.environ.get('CONTACT_LIST', '[]'))
+        return contacts if isinstance(contacts, list) else []
+    except (json.JSONDecodeError, TypeError) as e:
+        logger.error(f"Error loading contact list: {str(e)}")
+        return []
+
+
+_store: Optional[ContactStore] = None
+_store_lock = threading.Lock()
+
+
+def get_contact_store() -> Optional[ContactStore]:
+    """
+    Get the process-wide contact store
+
+    The database is CONTACT_DB_PATH (default contacts.db). The first time a
+    database is opened empty, contacts from the legacy CONTACT_LIST
+    environment variable are imported; later deletions are kept.
+
+    Returns:
+        ContactStore or None if the database cannot be opened
+    """
+    global _store
+
+    with _store_lock:
+        if _store is None:
+            try:
+                store = ContactStore(
+                    os.environ.get('CONTACT_DB_PATH', 'contacts.db'),
+                    default_country_code=os.environ.get('DEFAULT_COUNTRY_CODE', '64'),
+                    cache_seconds=float(os.environ.get('CONTACT_CACHE_SECONDS', '30'))
+                )
+            except sqlite3.Error as e:
+                logger.error(f"Error opening contact store: {str(e)}")
+                return None
+
+            imported = store.seed(load_env_contacts())
+            if imported:
+                logger.info(f"Imported {imported} contacts from CONTACT_LIST")
+            _store = store
+        return _store
@@ -0,0 +1,331 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger('coordination')
+
+
+class LeaseBackend(ABC):
+    """
+    Storage for named, time-limited leases shared between instances
+    """
+
+    @abstractmethod
+    def try_acquire(self, name: str, owner: str, ttl: float) -> bool:
+        """
+        Acquire or renew a lease
+
+        Args:
+            name: Lease name
+            owner: Identifier of the instance requesting the lease
+            ttl: Lease duration in seconds
+
+        Returns:
+            True if the owner holds the lease afterwards, False otherwise
+        """
+
+    @abstractmethod
+    def release(self, name: str, owner: str) -> bool:
+        """
+        Release a lease held by the owner
+
+        Args:
+            name: Lease name
+            owner: Identifier of the instance holding the lease
+
+        Returns:
+            True if the lease was released, False if it was not held by the owner
+        """
+
+
+class FileLeaseBackend(LeaseBackend):
+    """
+    Lease backend storing one JSON file per lease in a shared directory
+
+    Uses POSIX file locks, so it is not available on Windows; use the
+    SQLite backend there.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Initialize the file lease backend
+
+        Args:
+            directory: Directory for lease files, shared by all instances
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _update(self, name: str, owner: str, ttl: Optional[float]) -> bool:
+        """
+        Read and update a lease file under an exclusive file lock
+
+        Args:
+            name: Lease name
+            owner: Identifier of the instance
+            ttl: Lease duration in seconds, or None to release the lease
+
+        Returns:
+            True if the update was applied, False otherwise
+        """
+        # Imported here so the module still imports on Windows, which has no fcntl
+        import fcntl
+
+        path = os.path.join(self.directory, f"{name}.lease")
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = os.read(fd, 4096)
+            try:
+                lease = json.loads(raw) if raw else {}
+            except json.JSONDecodeError:
+                lease = {}
+
+            now = time.time()
+            held_by_other = (lease.get('owner') not in (None, owner)
+                             and lease.get('expires_at', 0) > now)
+            if held_by_other:
+                return False
+            if ttl is None and lease.get('owner') != owner:
+                return False
+
+            new_lease = {} if ttl is None else {'owner': owner, 'expires_at': now + ttl}
+            data = json.dumps(new_lease).encode('utf-8')
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, data)
+            return True
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def try_acquire(self, name: str, owner: str, ttl: float) -> bool:
+        return self._update(name, owner, ttl)
+
+    def release(self, name: str, owner: str) -> bool:
+        return self._update(name, owner, None)
+
+
+class SQLiteLeaseBackend(LeaseBackend):
+    """
+    Lease backend storing leases in a SQLite database
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the SQLite lease backend
+
+        Args:
+            path: Path to the SQLite database file, shared by all instances
+        """
+        self.path = path
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS leases ("
+                "name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10, isolation_level=None)
+
+    def try_acquire(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            cursor = conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE leases.owner = excluded.owner OR leases.expires_at <= ?",
+                (name, owner, now + ttl, now)
+            )
+            conn.execute("COMMIT")
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error(f"Error acquiring lease {name}: {str(e)}")
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            return False
+        finally:
+            conn.close()
+
+    def release(self, name: str, owner: str) -> bool:
+        try:
+            with self._connect() as conn:
+                cursor = conn.execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner))
+                return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error(f"Error releasing lease {name}: {str(e)}")
+            return False
+
+
+class ShardCoordinator:
+    """
+    Assigns polling shards to instances using leases so each shard has one active poller
+    """
+
+    def __init__(self, backend: LeaseBackend, shards: List[Dict[str, Any]], owner: str,
+                 ttl: float = 600, max_shards: Optional[int] = None):
+        """
+        Initialize the shard coordinator
+
+        Args:
+            backend: Lease backend shared by all instances
+            shards: Shard definitions (see load_shards)
+            owner: Identifier of this instance
+            ttl: Lease duration in seconds; must be longer than the polling interval
+            max_shards: Maximum number of shards this instance polls, or None for no limit
+        """
+        self.backend = backend
+        self.shards = shards
+        self.owner = owner
+        self.ttl = ttl
+        self.max_shards = max_shards
+        self.held: List[str] = []
+
+    def acquire_shards(self) -> List[Dict[str, Any]]:
+        """
+        Renew the leases this instance holds and try to take free shards
+
+        Shards already held are renewed first so assignments stay sticky and
+        the per-instance duplicate tracking in AlarmProcessor stays valid.
+
+        Returns:
+            Shards this instance should poll in this run
+        """
+        limit = self.max_shards if self.max_shards is not None else len(self.shards)
+        ordered = sorted(self.shards, key=lambda s: s['name'] not in self.held)
+
+        assigned = []
+        for shard in ordered:
+            name = shard['name']
+            if len(assigned) >= limit:
+                if name in self.held:
+                    self.backend.release(f"shard-{name}", self.owner)
+                continue
+            if self.backend.try_acquire(f"shard-{name}", self.owner, self.ttl):
+                assigned.append(shard)
+
+        self.held = [shard['name'] for shard in assigned]
+        logger.info(f"Instance {self.owner} holds shards: {self.held or 'none'}")
+        return assigned
+
+    def release_all(self) -> None:
+        """
+        Release every lease held by this instance
+        """
+        for name in self.held:
+            self.backend.release(f"shard-{name}", self.owner)
+        self.held = []
+
+
+def load_shards() -> List[Dict[str, Any]]:
+    """
+    Load shard definitions from the POLL_SHARDS environment variable
+
+    Each shard has a name and optionally a list of sources ("zd") and/or an
+    inclusive sid range, e.g. [{"name": "north", "zd": ["NORTH"]},
+    {"name": "low-sids", "sid_range": [0, 9999]}]. Without POLL_SHARDS a single
+    shard covers all alarms.
+
+    Returns:
+        List of shard definitions
+    """
+    try:
+        shards = json.loads(os.environ.get('POLL_SHARDS', '[]'))
+    except (json.JSONDecodeError, TypeError) as e:
+        logger.error(f"Error loading shard definitions: {str(e)}")
+        shards = []
+
+    shards = [s for s in shards if isinstance(s, dict) and s.get('name')]
+    return shards or [{'name': 'all'}]
+
+
+def get_instance_id() -> str:
+    """
+    Get an identifier for this instance
+
+    Returns:
+        INSTANCE_ID or WEBSITE_INSTANCE_ID if set, otherwise hostname and process id
+    """
+    return (os.environ.get('INSTANCE_ID')
+            or os.environ.get('WEBSITE_INSTANCE_ID')
+            or f"{socket.gethostname()}-{os.getpid()}")
+
+
+def create_lease_backend() -> Optional[LeaseBackend]:
+    """
+    Create the shared lease backend from environment variables
+
+    COORDINATION_BACKEND selects "file" or "sqlite" (default "none") and
+    COORDINATION_PATH the shared directory or database file.
+
+    Returns:
+        LeaseBackend or None if coordination is disabled
+    """
+    backend_type = os.environ.get('COORDINATION_BACKEND', 'none').lower()
+    path = os.environ.get('COORDINATION_PATH', '')
+
+    if backend_type == 'file':
+        return FileLeaseBackend(path or 'leases')
+    if backend_type == 'sqlite':
+        return SQLiteLeaseBackend(path or 'coordination.db')
+    if backend_type != 'none':
+        logger.warning(f"Unknown coordination backend '{backend_type}', coordination disabled")
+    return None
+
+
+def create_coordinator() -> Optional[ShardCoordinator]:
+    """
+    Create a shard coordinator from environment variables
+
+    Uses the lease backend from create_lease_backend; without one every
+    instance polls everything.
+
+    Returns:
+        ShardCoordinator or None if coordination is disabled
+    """
+    backend = create_lease_backend()
+    if backend is None:
+        return None
+
+    max_shards = os.environ.get('MAX_SHARDS_PER_INSTANCE')
+    return ShardCoordinator(
+        backend=backend,
+        shards=load_shards(),
+        owner=get_instance_id(),
+        ttl=float(os.environ.get('LEASE_TTL_SECONDS', '600')),
+        max_shards=int(max_shards) if max_shards else None
+    )
+
+
+def query_shard_alarms(eds_client, shard: Optional[Dict[str, Any]], **kwargs) -> List[Dict[str, Any]]:
+    """
+    Query the alarms belonging to a shard
+
+    Sources are filtered by EDS. Sid ranges are applied to the results.
+
+    Args:
+        eds_client: EDSClient or EDSFanoutPoller
+        shard: Shard definition, or None for all alarms
+        **kwargs: Additional arguments for EDSClient.query_alarms
+
+    Returns:
+        List of alarm objects in the shard
+    """
+    if not shard:
+        return eds_client.query_alarms(**kwargs)
+
+    alarms = eds_client.query_alarms(sources=shard.get('zd'), **kwargs)
+
+    sid_range = shard.get('sid_range')
+    if sid_range:
+        low, high = sid_range
+        alarms = [a for a in alarms if a.get('sid') is not None and low <= a['sid'] <= high]
+
+    return alarms
@@ -1,18 +1,24 @@
 import requests
 import logging
-import json
-import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Union, Any
+from typing import Dict, List, Optional, Tuple, Any
+
+import json_codec
+from http_transport import get_session
+from tracing import annotate, traced
 
 logger = logging.getLogger('eds_client')
 
+# Request bodies are encoded by json_codec rather than requests' json= argument
+JSON_HEADERS = {'Content-Type': 'application/json'}
+
 class EDSClient:
     """
     Client for interacting with the EDS API
     """
     
-    def __init__(self, base_url: str, username: str, password: str, client_type: str = 'azure_function'):
+    def __init__(self, base_url: str, username: str, password: str, client_type: str = 'azure_function',
+                 timeout: float = 30.0, site: Optional[str] = None):
         """
         Initialize the EDS client
         
@@ -21,14 +27,28 @@ class EDSClient:
             username: Username for authentication
             password: Password for authentication
             client_type: Client type identifier
+            timeout: Timeout in seconds for each HTTP request
+            site: Name of the EDS site this client queries, stored with recordings
         """
         self.base_url = base_url.rstrip('/')
+        self.site = site
         self.username = username
         self.password = password
         self.client_type = client_type
+        self.timeout = timeout
         self.session_id = None
-        self.session = requests.Session()
+        # Own session (and cookie jar) over the connection pool shared by
+        # every client of this host; the session token is sent per request
+        self.session = get_session(self.base_url)
+        self.auth_headers: Dict[str, str] = {}
+        
+        # Optional EDSRecorder capturing points/query responses for offline replay
+        self.recorder = None
+        
+        # Error from the most recent alarm query, or None if it succeeded
+        self.last_error: Optional[str] = None
         
+    @traced('eds.login')
     def login(self) -> Optional[str]:
         """
         Login to the EDS API and get a session ID
@@ -44,24 +64,22 @@ class EDSClient:
                 "type": self.client_type
             }
             
-            response = self.session.post(url, json=payload)
+            response = self.session.post(url, data=json_codec.dumps(payload), headers=JSON_HEADERS, timeout=self.timeout)
             response.raise_for_status()
             
-            data = response.json()
+            data = json_codec.loads(response.content)
             self.session_id = data.get('sessionId')
             
             if self.session_id:
-                # Update session headers with the Authorization token
-                self.session.headers.update({
-                    'Authorization': f'Bearer {self.session_id}'
-                })
+                # Send the Authorization token with every later request
+                self.auth_headers = {'Authorization': f'Bearer {self.session_id}'}
                 logger.info("Successfully logged in to EDS API")
                 return self.session_id
             else:
                 logger.error("Login response did not contain a session ID")
                 return None
                 
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:
             logger.error(f"Error during login: {str(e)}")
             return None
     
@@ -78,17 +96,19 @@ class EDSClient:
             
         try:
             url = f"{self.base_url}/api/v1/logout"
-            response = self.session.post(url)
+            response = self.session.post(url, headers=self.auth_headers, timeout=self.timeout)
             response.raise_for_status()
             
             logger.info("Successfully logged out from EDS API")
             self.session_id = None
+            self.auth_headers = {}
             return True
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:
             logger.error(f"Error during logout: {str(e)}")
             return False
     
+    @traced('eds.ping')
     def ping(self) -> bool:
         """
         Ping the EDS API to keep the session alive
@@ -102,30 +122,52 @@ class EDSClient:
             
         try:
             url = f"{self.base_url}/api/v1/ping"
-            response = self.session.get(url)
+            response = self.session.get(url, headers=self.auth_headers, timeout=self.timeout)
             response.raise_for_status()
             
             logger.debug("Successfully pinged EDS API")
             return True
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:
             logger.error(f"Error during ping: {str(e)}")
             return False
     
-    def query_alarms(self, minutes: int = 15, priorities: List[int] = None) -> List[Dict[str, Any]]:
+    def query_alarms(self, minutes: int = 15, priorities: List[int] = None,
+                     sources: List[str] = None) -> List[Dict[str, Any]]:
         """
         Query alarms from the EDS API
         
         Args:
             minutes: Look for alarms in the last X minutes
             priorities: List of alarm priorities to filter by
+            sources: Optional list of point sources (zd) to filter by
             
         Returns:
             List of alarm objects
         """
+        alarms, self.last_error = self.query_alarms_result(minutes, priorities, sources)
+        return alarms
+    
+    @traced('eds.query_alarms')
+    def query_alarms_result(self, minutes: int = 15, priorities: List[int] = None,
+                            sources: List[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Query alarms from the EDS API and return the outcome
+        
+        Unlike query_alarms this does not touch last_error, so one client
+        can be queried from several threads at once.
+        
+        Args:
+            minutes: Look for alarms in the last X minutes
+            priorities: List of alarm priorities to filter by
+            sources: Optional list of point sources (zd) to filter by
+            
+        Returns:
+            Tuple of (list of alarm objects, error message or None)
+        """
         if not self.session_id:
             logger.error("No active session for querying alarms")
-            return []
+            return [], "No active session"
             
         try:
             # Use the points/query endpoint to get alarm data
@@ -152,21 +194,28 @@ class EDSClient:
                     "quality": ["GOOD", "FAIR"]  # Only get alarms with good quality
                 }],
                 "order": ["ap", "-ts"],  # Order by priority and then by timestamp desc
-                "fields": ["sid", "iess", "desc", "value", "ts", "ap", "quality", "aux"]
+                "fields": ["sid", "iess", "desc", "value", "ts", "ap", "quality", "aux", "zd"]
             }
             
-            response = self.session.post(url, json=payload)
+            if sources:
+                payload["filters"][0]["zd"] = sources
+            
+            response = self.session.post(url, data=json_codec.dumps(payload), headers=dict(JSON_HEADERS, **self.auth_headers), timeout=self.timeout)
             response.raise_for_status()
             
-            data = response.json()
+            data = json_codec.loads(response.content)
             alarms = data.get('points', [])
             
+            if self.recorder is not None:
+                self.recorder.record('points/query', payload, data, site=self.site)
+            
             logger.info(f"Retrieved {len(alarms)} alarms from EDS API")
-            return alarms
+            annotate(alarms=len(alarms), bytes=len(response.content))
+            return alarms, None
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:
             logger.error(f"Error querying alarms: {str(e)}")
-            return []
+            return [], str(e)
             
     def get_alarm_details(self, sid: int) -> Optional[Dict[str, Any]]:
         """
@@ -193,10 +242,10 @@ class EDSClient:
                            "aux", "idcs", "zd", "un", "dp", "artd", "ard"]
             }
             
-            response = self.session.post(url, json=payload)
+            response = self.session.post(url, data=json_codec.dumps(payload), headers=dict(JSON_HEADERS, **self.auth_headers), timeout=self.timeout)
             response.raise_for_status()
             
-            data = response.json()
+            data = json_codec.loads(response.content)
             points = data.get('points', [])
             
             if points:
@@ -205,6 +254,6 @@ class EDSClient:
                 logger.warning(f"No details found for alarm with sid {sid}")
                 return None
                 
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:
             logger.error(f"Error getting alarm details: {str(e)}")
             return None
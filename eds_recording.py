@@ -0,0 +1,326 @@
+import argparse
+import glob
+import gzip
+import heapq
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+import json_codec
+
+logger = logging.getLogger('eds_recording')
+
+
+def _process_path(path: str) -> str:
+    """
+    Add the process ID to a recording path, e.g. eds.jsonl.gz -> eds-1234.jsonl.gz
+
+    Args:
+        path: Configured recording path
+
+    Returns:
+        Path only this process writes to
+    """
+    directory, name = os.path.split(path)
+    stem, dot, suffix = name.partition('.')
+    return os.path.join(directory, f"{stem}-{os.getpid()}{dot}{suffix}")
+
+
+class EDSRecorder:
+    """
+    Records EDS points/query responses to a compressed JSON lines file
+
+    Every process writes its own file (the process ID is added to the path),
+    so gunicorn and Function workers never interleave writes. Each recorded
+    poll is a complete gzip member, so a killed worker loses at most the
+    poll it was writing.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the recorder
+
+        Args:
+            path: Path of the gzip file to append recordings to; the process ID is added to it
+        """
+        self.path = _process_path(path)
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def record(self, endpoint: str, request: Dict[str, Any], response: Dict[str, Any],
+               site: Optional[str] = None) -> None:
+        """
+        Append one request/response pair to the recording
+
+        Args:
+            endpoint: EDS API endpoint that was called
+            request: Request payload
+            response: Decoded response body
+            site: Name of the EDS site that answered, so replays can tag its alarms
+        """
+        entry = {
+            'ts': time.time(),
+            'endpoint': endpoint,
+            'site': site,
+            'request': request,
+            'response': response
+        }
+        data = gzip.compress(json_codec.dumps(entry) + b'\n')
+        try:
+            with self._lock, open(self.path, 'ab') as f:
+                f.write(data)
+                self.count += 1
+        except OSError as e:
+            logger.error(f"Error writing EDS recording: {str(e)}")
+
+    def close(self) -> None:
+        """
+        Close the recording; every entry is already complete on disk, so there is nothing to flush
+        """
+
+
+def load_recording(path: str, endpoint: str = 'points/query') -> Iterator[Dict[str, Any]]:
+    """
+    Read entries from a recording file
+
+    Args:
+        path: Path of the gzip recording file
+        endpoint: Only return entries for this endpoint
+
+    Returns:
+        Iterator over recorded entries in file order
+    """
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        while True:
+            try:
+                line = f.readline()
+            except (EOFError, gzip.BadGzipFile):
+                # A worker killed mid-write leaves a truncated last gzip member
+                logger.warning(f"Recording {path} ends with a truncated entry")
+                return
+            if not line:
+                return
+            if not line.strip():
+                continue
+            try:
+                entry = json_codec.loads(line)
+            except ValueError:
+                logger.warning("Skipping unreadable recording entry")
+                continue
+            if entry.get('endpoint') == endpoint:
+                yield entry
+
+
+def load_recordings(paths: Union[str, List[str]], endpoint: str = 'points/query') -> Iterator[Dict[str, Any]]:
+    """
+    Read entries from several recording files, e.g. one per worker process, in time order
+
+    Args:
+        paths: Recording paths or glob patterns
+        endpoint: Only return entries for this endpoint
+
+    Returns:
+        Iterator over recorded entries ordered by recording time
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    files = sorted({match for pattern in paths for match in (glob.glob(pattern) or [pattern])})
+    return heapq.merge(*(load_recording(path, endpoint) for path in files), key=lambda entry: entry['ts'])
+
+
+class StubTNZClient:
+    """
+    Stand-in for TNZClient that records messages instead of sending them
+    """
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Initialize the stub
+
+        Args:
+            latency: Simulated send latency in seconds
+        """
+        self.latency = latency
+        self.sent: List[Dict[str, Any]] = []
+
+    def send_sms(self, to: str, message: str, sender_id: str = None,
+                 reference: str = None, validate_only: bool = False) -> bool:
+        if self.latency:
+            time.sleep(self.latency)
+        self.sent.append({'to': to, 'message': message})
+        return True
+
+    def send_sms_result(self, to: str, message: str, sender_id: str = None,
+                        reference: str = None, validate_only: bool = False) -> Dict[str, Any]:
+        self.send_sms(to, message, sender_id, reference, validate_only)
+        return {'success': True, 'message_id': f"stub-{len(self.sent)}", 'error': None}
+
+
+def create_replay_processor(directory: str, notification_threshold: int = 2):
+    """
+    Create an AlarmProcessor whose contacts, suppression log and audit log are scoped to a replay
+
+    The contacts (CONTACT_DB_PATH, or CONTACT_LIST if there is no database)
+    and suppression windows (SUPPRESSION_DB_PATH) are copied into the replay
+    directory, so a replay notifies the same contacts and suppresses the
+    same alarms without reading or writing the production stores.
+
+    Args:
+        directory: Directory for the replay's stores
+        notification_threshold: Alarm notification threshold
+
+    Returns:
+        AlarmProcessor instance
+    """
+    from alarm_processor import AlarmProcessor
+    from contact_store import ContactStore, load_env_contacts
+    from notification_audit import NotificationAuditLog
+    from suppression import SuppressionStore, load_timezone
+
+    os.makedirs(directory, exist_ok=True)
+    contact_path = os.path.join(directory, 'contacts.db')
+    production_contacts = os.environ.get('CONTACT_DB_PATH', 'contacts.db')
+    if production_contacts and os.path.exists(production_contacts):
+        shutil.copyfile(production_contacts, contact_path)
+    contact_store = ContactStore(contact_path,
+                                 default_country_code=os.environ.get('DEFAULT_COUNTRY_CODE', '64'))
+    contact_store.seed(load_env_contacts())
+
+    suppression_path = os.path.join(directory, 'suppression.db')
+    production_path = os.environ.get('SUPPRESSION_DB_PATH', 'suppression.db')
+    if production_path and os.path.exists(production_path):
+        shutil.copyfile(production_path, suppression_path)
+
+    return AlarmProcessor(
+        notification_threshold=notification_threshold,
+        renotify_minutes=float(os.environ.get('ALARM_RENOTIFY_MINUTES', '60')),
+        contact_store=contact_store,
+        suppression_store=SuppressionStore(suppression_path, tz=load_timezone()),
+        audit_log=NotificationAuditLog(os.path.join(directory, 'audit_log'))
+    )
+
+
+class EDSReplayer:
+    """
+    Replays recorded EDS responses through AlarmProcessor and the notification send path
+    """
+
+    def __init__(self, path: Union[str, List[str]], speed: float = 1.0):
+        """
+        Initialize the replayer
+
+        Args:
+            path: Recording path or glob pattern, or a list of them (e.g. one file per worker)
+            speed: Replay speed multiplier; 1.0 is real time, 0 replays as fast as possible
+        """
+        self.path = path
+        self.speed = speed
+
+    def replay(self, processor, tnz_client=None) -> Dict[str, Any]:
+        """
+        Feed every recorded query result through the processor and send path
+
+        Notifications are sent through a NotificationScheduler, as in
+        production, that records to the processor's audit log.
+
+        Args:
+            processor: AlarmProcessor instance, normally from create_replay_processor
+            tnz_client: Client used to send notifications (defaults to StubTNZClient)
+
+        Returns:
+            Replay statistics including processing throughput
+        """
+        from notification_queue import NotificationScheduler, PriorityNotificationQueue
+
+        if tnz_client is None:
+            tnz_client = StubTNZClient()
+        scheduler = NotificationScheduler(PriorityNotificationQueue(), processor.audit_log)
+
+        stats = {
+            'polls': 0,
+            'alarms': 0,
+            'notifications': 0,
+            'sent': 0,
+            'failed': 0,
+            'processing_seconds': 0.0,
+            'sending_seconds': 0.0,
+            'max_poll_seconds': 0.0,
+        }
+
+        first_ts: Optional[float] = None
+        replay_started = time.monotonic()
+
+        for entry in load_recordings(self.path):
+            if first_ts is None:
+                first_ts = entry['ts']
+
+            # Wait until this poll is due relative to the start of the replay
+            if self.speed > 0:
+                due = (entry['ts'] - first_ts) / self.speed
+                delay = due - (time.monotonic() - replay_started)
+                if delay > 0:
+                    time.sleep(delay)
+
+            alarms = entry.get('response', {}).get('points', [])
+            if entry.get('site'):
+                # Tag alarms as EDSFanoutPoller does, so equal sids from different sites stay apart
+                alarms = [dict(alarm, site=entry['site']) for alarm in alarms]
+
+            started = time.perf_counter()
+            # Process at the recorded poll time, not the replay time, so an old
+            # recording dedupes and matches quiet hours as it did when recorded
+            notifications = processor.process_alarms(alarms, now=entry['ts'])
+            processed = time.perf_counter()
+
+            scheduler.submit(notifications)
+            for _, result in scheduler.drain(tnz_client):
+                if result:
+                    stats['sent'] += 1
+                else:
+                    stats['failed'] += 1
+            finished = time.perf_counter()
+
+            stats['polls'] += 1
+            stats['alarms'] += len(alarms)
+            stats['notifications'] += len(notifications)
+            stats['processing_seconds'] += processed - started
+            stats['sending_seconds'] += finished - processed
+            stats['max_poll_seconds'] = max(stats['max_poll_seconds'], finished - started)
+
+        if processor.audit_log is not None:
+            processor.audit_log.flush()
+        stats['wall_seconds'] = time.monotonic() - replay_started
+        if stats['processing_seconds'] > 0:
+            stats['alarms_per_second'] = stats['alarms'] / stats['processing_seconds']
+        else:
+            stats['alarms_per_second'] = 0.0
+        return stats
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    parser = argparse.ArgumentParser(description='Replay a recorded EDS alarm stream')
+    parser.add_argument('recording', nargs='+',
+                        help='Recording files or glob patterns, e.g. "eds_recording-*.jsonl.gz"')
+    parser.add_argument('--speed', type=float, default=0.0,
+                        help='Replay speed multiplier (1 = real time, 0 = as fast as possible)')
+    parser.add_argument('--threshold', type=int, default=2, help='Alarm notification threshold')
+    parser.add_argument('--send-latency', type=float, default=0.0,
+                        help='Simulated SMS send latency in seconds')
+    parser.add_argument('--output-dir', default=None,
+                        help='Directory for the replay suppression and audit logs (default: a new temporary directory)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    output_dir = args.output_dir or tempfile.mkdtemp(prefix='eds-replay-')
+    result = EDSReplayer(args.recording, speed=args.speed).replay(
+        create_replay_processor(output_dir, args.threshold),
+        StubTNZClient(latency=args.send_latency)
+    )
+    print(f"output_dir: {output_dir}")
+    for key, value in result.items():
+        print(f"{key}: {round(value, 4) if isinstance(value, float) else value}")
@@ -0,0 +1,288 @@
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional, Tuple
+
+from eds_client import EDSClient
+from tracing import run_in_context, span
+
+logger = logging.getLogger('eds_sites')
+
+
+def load_eds_sites(default_client_type: str = 'web_interface') -> List[Dict[str, Any]]:
+    """
+    Load EDS site definitions from environment variables
+
+    EDS_SITES holds a JSON list of sites, each with a name, base_url,
+    username, password and optional client_type. Without EDS_SITES the
+    single EDS_API_* configuration is used as a site named "default".
+
+    Args:
+        default_client_type: Client type used when a site does not set one
+
+    Returns:
+        List of site definitions with all required fields
+    """
+    sites = []
+    try:
+        sites = json.loads(os.environ.get('EDS_SITES', '[]'))
+    except (json.JSONDecodeError, TypeError) as e:
+        logger.error(f"Error loading EDS sites: {str(e)}")
+        sites = []
+
+    if not sites and os.environ.get('EDS_API_BASE_URL'):
+        sites = [{
+            'name': 'default',
+            'base_url': os.environ.get('EDS_API_BASE_URL', ''),
+            'username': os.environ.get('EDS_API_USERNAME', ''),
+            'password': os.environ.get('EDS_API_PASSWORD', ''),
+            'client_type': os.environ.get('EDS_API_CLIENT_TYPE', default_client_type),
+        }]
+
+    valid = []
+    for site in sites:
+        if not isinstance(site, dict) or not all(site.get(k) for k in ('name', 'base_url', 'username', 'password')):
+            logger.warning(f"Skipping incomplete EDS site definition: {site.get('name') if isinstance(site, dict) else site}")
+            continue
+        site.setdefault('client_type', default_client_type)
+        valid.append(site)
+    return valid
+
+
+class EDSFanoutPoller:
+    """
+    Queries alarms from several EDS sites in parallel and merges the results
+
+    Each site has its own EDSClient and login session; sites on the same host
+    share pooled HTTP connections (see http_transport). A failing or slow site
+    only affects its own results: the poll returns after the slowest site
+    answers or the poll timeout expires, whichever comes first.
+    """
+
+    def __init__(self, sites: List[Dict[str, Any]], timeout: float = 15.0,
+                 poll_timeout: Optional[float] = None):
+        """
+        Initialize the fan-out poller
+
+        Args:
+            sites: Site definitions (see load_eds_sites)
+            timeout: Timeout in seconds for each HTTP request
+            poll_timeout: Maximum time in seconds to wait for all sites (defaults to 2 x timeout)
+        """
+        self.sites = sites
+        self.poll_timeout = poll_timeout if poll_timeout is not None else timeout * 2
+        self.clients: Dict[str, EDSClient] = {
+            site['name']: EDSClient(
+                base_url=site['base_url'],
+                username=site['username'],
+                password=site['password'],
+                client_type=site['client_type'],
+                timeout=timeout,
+                site=site['name']
+            )
+            for site in sites
+        }
+        # Logins are serialised per site; queries run concurrently
+        self._login_locks = {name: threading.Lock() for name in self.clients}
+        # Identical queries to a site that overlap share one request (single-flight):
+        # (site, query arguments) -> [future, number of callers waiting on it]
+        self._inflight: Dict[Tuple[str, str], List[Any]] = {}
+        self._inflight_lock = threading.RLock()
+        self._executor = ThreadPoolExecutor(max_workers=max(len(sites) * 4, 4), thread_name_prefix='eds-site')
+
+        # Per-site outcome of the most recent poll
+        self.site_status: Dict[str, Dict[str, Any]] = {}
+        self.last_error: Optional[str] = None
+
+    def _login(self, name: str, stale_session: Optional[str] = None) -> bool:
+        """
+        Log in to a site unless another thread already did
+
+        Args:
+            name: Site name
+            stale_session: Session ID that failed; a different current session is reused
+
+        Returns:
+            True if the site has a session afterwards
+        """
+        client = self.clients[name]
+        with self._login_locks[name]:
+            if client.session_id and client.session_id != stale_session:
+                return True
+            return bool(client.login())
+
+    def _query_site(self, name: str, **kwargs) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Query one site, logging in first if it has no session
+
+        Args:
+            name: Site name
+            **kwargs: Arguments for EDSClient.query_alarms
+
+        Returns:
+            Tuple of (alarms tagged with the site name, error message or None)
+        """
+        client = self.clients[name]
+        started = time.perf_counter()
+
+        with span('eds.site', site=name) as site_span:
+            session_id = client.session_id
+            if not session_id and not self._login(name):
+                alarms, error = [], 'login failed'
+            else:
+                session_id = client.session_id
+                alarms, error = client.query_alarms_result(**kwargs)
+                if error and self._login(name, stale_session=session_id):
+                    # The reused session may have expired; retry once with a fresh one
+                    alarms, error = client.query_alarms_result(**kwargs)
+            if site_span is not None:
+                site_span.error = error
+
+        self.site_status[name] = {
+            'ok': error is None,
+            'error': error,
+            'alarms': len(alarms),
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        }
+        return [dict(alarm, site=name) for alarm in alarms], error
+
+    def _submit(self, name: str, kwargs: Dict[str, Any]) -> Tuple[Tuple[str, str], Any]:
+        """
+        Start a site query, or join an identical one that is still running
+
+        Returns:
+            Tuple of (single-flight key, future)
+        """
+        key = (name, repr(sorted(kwargs.items())))
+        with self._inflight_lock:
+            entry = self._inflight.get(key)
+            if entry is not None and not entry[0].done():
+                entry[1] += 1
+                return key, entry[0]
+            future = self._executor.submit(run_in_context(self._query_site), name, **kwargs)
+            self._inflight[key] = [future, 1]
+        future.add_done_callback(lambda f, key=key: self._forget(key, f))
+        return key, future
+
+    def _forget(self, key: Tuple[str, str], future) -> None:
+        with self._inflight_lock:
+            entry = self._inflight.get(key)
+            if entry is not None and entry[0] is future:
+                del self._inflight[key]
+
+    def _abandon(self, key: Tuple[str, str], future) -> None:
+        """
+        Stop waiting for a query, cancelling it if it has not started and no other caller waits on it
+        """
+        with self._inflight_lock:
+            entry = self._inflight.get(key)
+            if entry is None or entry[0] is not future:
+                return
+            entry[1] -= 1
+            if entry[1] <= 0:
+                # A cancelled future runs its done callback, which forgets it
+                future.cancel()
+
+    def query_alarms_result(self, **kwargs) -> Tuple[List[Dict[str, Any]], Dict[str, str]]:
+        """
+        Query alarms from all sites in parallel and return per-site errors
+
+        Safe to call from several threads at once: overlapping identical
+        queries share one request per site.
+
+        Args:
+            **kwargs: Arguments for EDSClient.query_alarms
+
+        Returns:
+            Tuple of (merged alarms tagged with their site name, site name to error for failed sites)
+        """
+        futures = {}
+        for name in self.clients:
+            key, future = self._submit(name, kwargs)
+            futures[future] = (name, key)
+        done, not_done = wait(futures, timeout=self.poll_timeout)
+
+        alarms = []
+        errors = {}
+        for future in done:
+            name = futures[future][0]
+            try:
+                site_alarms, error = future.result()
+            except Exception as e:
+                logger.error(f"Error polling EDS site {name}: {str(e)}")
+                site_alarms, error = [], str(e)
+            alarms.extend(site_alarms)
+            if error:
+                errors[name] = error
+
+        for future in not_done:
+            name, key = futures[future]
+            logger.error(f"EDS site {name} did not answer within {self.poll_timeout}s")
+            self._abandon(key, future)
+            self.site_status[name] = {'ok': False, 'error': 'timeout', 'alarms': 0}
+            errors[name] = 'timeout'
+
+        logger.info(f"Retrieved {len(alarms)} alarms from {len(futures) - len(errors)} of {len(futures)} EDS sites")
+        return alarms, errors
+
+    def query_alarms(self, **kwargs) -> List[Dict[str, Any]]:
+        """
+        Query alarms from all sites in parallel
+
+        Accepts the same arguments as EDSClient.query_alarms, so the poller
+        can be used wherever a single client is polled. Errors are left in
+        last_error; concurrent callers should use query_alarms_result.
+
+        Args:
+            **kwargs: Arguments for EDSClient.query_alarms
+
+        Returns:
+            Merged list of alarms, each tagged with its site name
+        """
+        alarms, errors = self.query_alarms_result(**kwargs)
+        self.last_error = '; '.join(f"{name}: {error}" for name, error in errors.items()) or None
+        return alarms
+
+    def login_all(self) -> Dict[str, bool]:
+        """
+        Make sure every site has a session, logging in where needed
+
+        Returns:
+            Dictionary of site name to True if the site has an active session
+        """
+        futures = {name: self._executor.submit(run_in_context(self._login), name) for name in self.clients}
+        wait(futures.values(), timeout=self.poll_timeout)
+        return {name: f.done() and not f.exception() and f.result() for name, f in futures.items()}
+
+    def ping_site(self, name: str) -> Tuple[bool, Optional[str]]:
+        """
+        Check one site with a ping round trip, logging in first if needed
+
+        Args:
+            name: Site name
+
+        Returns:
+            Tuple of (True if the site answered, error message or None)
+        """
+        client = self.clients[name]
+        session_id = client.session_id
+        if not session_id and not self._login(name):
+            return False, 'login failed'
+        session_id = client.session_id
+        if client.ping():
+            return True, None
+        # The reused session may have expired; retry once with a fresh one
+        if self._login(name, stale_session=session_id) and client.ping():
+            return True, None
+        return False, 'ping failed'
+
+    def close(self) -> None:
+        """
+        Log out from every site and stop the worker threads
+        """
+        for client in self.clients.values():
+            client.logout()
+        self._executor.shutdown(wait=False)
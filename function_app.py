@@ -1,12 +1,13 @@
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
 import azure.functions as func
 import datetime
 import logging
 import os
-import json
 
-from eds_client import EDSClient
-from tnz_client import TNZClient
-from alarm_processor import AlarmProcessor
+from tracing import annotate, profiled, span
 
 app = func.FunctionApp()
 
@@ -14,73 +15,250 @@ app = func.FunctionApp()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger('alarm_notification_function')
 
+# Reusable singletons that survive warm invocations of this worker process.
+# The client modules (and requests) are imported lazily on first use so the
+# host can index the functions without paying for them.
+_processor = None
+_coordinator = None
+_coordinator_loaded = False
+_poll_scheduler = None
+_poll_scheduler_loaded = False
+_invocation_count = 0
+_profile_next_invocation = os.environ.get('PROFILE_NEXT_INVOCATION', 'false').lower() == 'true'
+_startup_timings = {'module_import_ms': 0.0, 'clients_init_ms': 0.0}
+
+
+def _get_processor():
+    """
+    Get the alarm processor singleton, creating it on first use
+
+    Keeping one processor per worker also keeps its record of notified
+    alarms across warm invocations.
+
+    Returns:
+        AlarmProcessor instance
+    """
+    global _processor
+
+    if _processor is None:
+        from alarm_processor import AlarmProcessor
+
+        _processor = AlarmProcessor(
+            notification_threshold=int(os.environ.get('ALARM_NOTIFICATION_THRESHOLD', '2')),
+            last_run_minutes=int(os.environ.get('LAST_RUN_MINUTES', '15')),
+            renotify_minutes=float(os.environ.get('ALARM_RENOTIFY_MINUTES', '60'))
+        )
+    return _processor
+
+
+def _get_coordinator():
+    """
+    Get the shard coordinator singleton, creating it on first use
+
+    Returns:
+        ShardCoordinator or None if coordination is disabled
+    """
+    global _coordinator, _coordinator_loaded
+
+    if not _coordinator_loaded:
+        from coordination import create_coordinator
+
+        _coordinator = create_coordinator()
+        _coordinator_loaded = True
+    return _coordinator
+
+
+def _get_poll_scheduler():
+    """
+    Get the adaptive poll scheduler singleton, creating it on first use
+
+    Returns:
+        AdaptivePollScheduler or None if adaptive polling is disabled
+    """
+    global _poll_scheduler, _poll_scheduler_loaded
+
+    if not _poll_scheduler_loaded:
+        from adaptive_poller import create_poll_scheduler
+
+        _poll_scheduler = create_poll_scheduler()
+        _poll_scheduler_loaded = True
+    return _poll_scheduler
+
+
+def _init_clients():
+    """
+    Initialize (or reuse) the shared multi-site EDS poller, TNZ client and processor
+
+    Returns:
+        Tuple of (eds_poller, tnz_client, processor); eds_poller is None if no EDS site is configured
+    """
+    started = time.perf_counter()
+    from shared_clients import get_eds_poller, get_tnz_client
+
+    eds_poller = get_eds_poller(default_client_type='azure_function')
+    tnz_client = get_tnz_client()
+    processor = _get_processor()
+
+    if _invocation_count <= 1:
+        _startup_timings['clients_init_ms'] = (time.perf_counter() - started) * 1000
+    return eds_poller, tnz_client, processor
+
+
+def get_startup_report() -> dict:
+    """
+    Get cold start timings for this worker process
+
+    Returns:
+        Dictionary with import and client initialization times and invocation count
+    """
+    return {
+        'module_import_ms': round(_startup_timings['module_import_ms'], 1),
+        'clients_init_ms': round(_startup_timings['clients_init_ms'], 1),
+        'invocations': _invocation_count,
+        'warm': _invocation_count > 1,
+    }
+
+
 @app.function_name(name="AlarmNotificationTrigger")
-@app.schedule(schedule="0 */5 * * * *", arg_name="timer", run_on_startup=False, use_monitor=True)
+@app.schedule(schedule=os.environ.get('POLL_SCHEDULE', "0 */5 * * * *"), arg_name="timer",
+              run_on_startup=False, use_monitor=True)
 def alarm_notification_function(timer: func.TimerRequest) -> None:
     """
     Azure Function that retrieves alarms from EDS API and sends SMS notifications via TNZ API
-    This function runs every 5 minutes by default
+    This function runs every 5 minutes by default. With ADAPTIVE_POLLING enabled the
+    timer is a tick and the adaptive scheduler decides which ticks poll EDS.
     """
+    global _invocation_count, _profile_next_invocation
+
+    _invocation_count += 1
+    invocation_started = time.perf_counter()
     logger.info('Alarm notification function executed at %s', datetime.datetime.utcnow().isoformat())
-    
+
     if timer.past_due:
         logger.info('The timer is past due!')
-    
+
+    # PROFILE_NEXT_INVOCATION profiles one invocation per worker process
+    profile = _profile_next_invocation
+    _profile_next_invocation = False
+
     try:
-        # Initialize EDS client
-        eds_client = EDSClient(
-            base_url=os.environ.get('EDS_API_BASE_URL'),
-            username=os.environ.get('EDS_API_USERNAME'),
-            password=os.environ.get('EDS_API_PASSWORD'),
-            client_type=os.environ.get('EDS_API_CLIENT_TYPE', 'azure_function')
-        )
-        
-        # Initialize TNZ client
-        tnz_client = TNZClient(
-            base_url=os.environ.get('TNZ_API_BASE_URL', 'https://api.tnz.co.nz/api/v1'),
-            api_key=os.environ.get('TNZ_API_KEY')
-        )
-        
-        # Initialize alarm processor
-        processor = AlarmProcessor(
-            notification_threshold=int(os.environ.get('ALARM_NOTIFICATION_THRESHOLD', '2')),
-            last_run_minutes=int(os.environ.get('LAST_RUN_MINUTES', '15'))
-        )
-        
-        # Login to EDS API
-        session_id = eds_client.login()
-        if not session_id:
-            logger.error("Failed to login to EDS API")
-            return
-        
-        # Retrieve alarms from EDS API
-        try:
-            # Query alarms based on timestamp and priority
-            alarms = eds_client.query_alarms()
-            logger.info(f"Retrieved {len(alarms)} alarms from EDS API")
-            
-            # Process alarms to determine which ones need SMS notifications
-            notifications = processor.process_alarms(alarms)
-            logger.info(f"Processed {len(notifications)} alarms that require notifications")
-            
-            # Send SMS notifications
-            if notifications:
-                for notification in notifications:
-                    result = tnz_client.send_sms(
-                        to=notification['recipient'],
-                        message=notification['message']
-                    )
-                    if result:
-                        logger.info(f"SMS notification sent successfully to {notification['recipient']}")
-                    else:
-                        logger.error(f"Failed to send SMS notification to {notification['recipient']}")
-            else:
-                logger.info("No notifications to send")
-                
-        finally:
-            # Always logout from EDS API
-            eds_client.logout()
-            
+        with profiled('timer', enabled=profile), \
+                span('timer', root=True, invocation=_invocation_count, cold=_invocation_count == 1):
+            _poll_and_notify()
     except Exception as e:
         logger.error(f"Error in alarm notification function: {str(e)}")
         raise
+    finally:
+        elapsed_ms = (time.perf_counter() - invocation_started) * 1000
+        start_type = 'cold' if _invocation_count == 1 else 'warm'
+        logger.info(f"Invocation {_invocation_count} ({start_type}) completed in {elapsed_ms:.1f} ms")
+
+
+def _poll_and_notify() -> None:
+    """
+    Poll EDS for alarms and send notifications, one tracing span per stage
+    """
+    # Skip this tick without touching EDS if the adaptive scheduler says we are not due
+    poll_started = time.time()
+    poll_scheduler = _get_poll_scheduler()
+    if poll_scheduler is not None and not poll_scheduler.is_due(poll_started):
+        logger.info(f"Poll not due, skipping: {poll_scheduler.status()}")
+        return
+
+    # Reuse clients and the EDS sessions from previous warm invocations
+    with span('init_clients'):
+        eds_poller, tnz_client, processor = _init_clients()
+    if _invocation_count == 1:
+        logger.info(f"Cold start: {get_startup_report()}")
+
+    if eds_poller is None:
+        logger.error("EDS API not configured")
+        return
+
+    if tnz_client is None:
+        logger.error("TNZ API key not configured")
+        return
+
+    # Only poll the shards this instance holds a lease for
+    from coordination import query_shard_alarms
+
+    with span('acquire_shards'):
+        coordinator = _get_coordinator()
+        shards = coordinator.acquire_shards() if coordinator else [None]
+    if not shards:
+        logger.info("All shards are polled by other instances, skipping this run")
+        return
+
+    # Query alarms from all sites in parallel, covering the time since the last successful poll
+    query_args = {}
+    if poll_scheduler is not None:
+        query_args['minutes'] = poll_scheduler.window_minutes(poll_started)
+
+    alarms = []
+    poll_error = False
+    with span('query_alarms', shards=len(shards)):
+        for shard in shards:
+            alarms.extend(query_shard_alarms(eds_poller, shard, **query_args))
+            poll_error = poll_error or eds_poller.last_error is not None
+        annotate(alarms=len(alarms))
+    logger.info(f"Retrieved {len(alarms)} alarms from EDS API: {eds_poller.site_status}")
+
+    # Process alarms to determine which ones need SMS notifications; unseen
+    # alarms are counted first, since processing marks them as notified
+    with span('process_alarms', alarms=len(alarms)):
+        new_alarms = processor.count_new(alarms)
+        notifications = processor.process_alarms(alarms)
+        annotate(new_alarms=new_alarms, notifications=len(notifications))
+    logger.info(f"Processed {len(notifications)} alarms that require notifications")
+
+    if poll_scheduler is not None:
+        poll_scheduler.record(new_alarms, error=poll_error, now=poll_started)
+        logger.info(f"Poll cadence: {poll_scheduler.status()}")
+
+    # Send SMS notifications, highest priority first
+    if notifications:
+        from notification_queue import get_scheduler
+
+        with span('send_notifications', notifications=len(notifications)):
+            scheduler = get_scheduler()
+            scheduler.submit(notifications)
+            scheduler.drain(tnz_client)
+        logger.info(f"Send queue stats: {scheduler.queue.stats()}")
+    else:
+        logger.info("No notifications to send")
+
+    from http_transport import transport_stats
+
+    logger.info(f"HTTP connection reuse: {transport_stats()}")
+
+    # Write audit records before the host can freeze this process between invocations
+    from notification_audit import get_audit_log
+
+    audit_log = get_audit_log()
+    if audit_log is not None:
+        with span('audit_flush'):
+            timeout = float(os.environ.get('AUDIT_FLUSH_TIMEOUT_SECONDS', '10'))
+            if not audit_log.flush(timeout=timeout):
+                logger.warning(f"Audit records still queued after {timeout}s; they are written in the background")
+
+
+if os.environ.get('ENABLE_WARMUP_TRIGGER', 'false').lower() == 'true':
+    @app.function_name(name="AlarmNotificationWarmup")
+    @app.route(route="warmup", methods=["GET", "POST"], auth_level=func.AuthLevel.FUNCTION)
+    def warmup_function(req: func.HttpRequest) -> func.HttpResponse:
+        """
+        Optional HTTP trigger that loads the client modules and logs in to EDS
+        ahead of the first timer run
+        """
+        import json
+
+        started = time.perf_counter()
+        eds_poller, tnz_client, processor = _init_clients()
+        report = get_startup_report()
+        report['eds_sessions'] = eds_poller.login_all() if eds_poller is not None else {}
+        report['warmup_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(f"Warm-up completed: {report}")
+        return func.HttpResponse(json.dumps(report), mimetype='application/json')
+
+
+_startup_timings['module_import_ms'] = (time.perf_counter() - _IMPORT_STARTED) * 1000
@@ -0,0 +1,35 @@
+import multiprocessing
+import os
+
+# Production serving configuration for the web dashboard:
+#   gunicorn -c gunicorn.conf.py main:app
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# Each worker process keeps its own pooled EDS/TNZ clients (see shared_clients.py)
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 8)))
+
+# gthread: every worker serves WEB_THREADS requests concurrently, so a slow
+# upstream EDS call only occupies one thread instead of a whole worker.
+# Set GUNICORN_WORKER_CLASS=gevent (requires the gevent package) to serve
+# requests as cooperative greenlets for very high viewer counts.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('WEB_THREADS', '32'))
+# Caps open client connections per worker: gevent uses it for concurrent
+# greenlets, gthread for the keep-alive connections it holds between requests
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', '1000'))
+
+# Must exceed UPSTREAM_HTTP_TIMEOUT so upstream timeouts surface as errors
+# instead of worker restarts
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = 30
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '5'))
+
+# Set GUNICORN_MAX_REQUESTS to recycle workers periodically if memory grows.
+# Off by default: a restarting worker drops its keep-alive connections
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = min(500, max_requests // 10)
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
@@ -0,0 +1,328 @@
+import logging
+import os
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+logger = logging.getLogger('http_transport')
+
+
+class DNSCache:
+    """
+    Caches host name resolution for a fixed time
+
+    New connections to EDS and TNZ reuse the addresses resolved for the
+    previous one instead of waiting on the resolver. If a lookup fails after
+    an entry expires, the stale addresses are used rather than failing the
+    request.
+    """
+
+    def __init__(self, ttl: float = 300):
+        """
+        Initialize the cache
+
+        Args:
+            ttl: Seconds a resolved address list is reused for
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[Tuple]]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host: str, port: int) -> List[Tuple]:
+        """
+        Resolve a host to socket addresses
+
+        Args:
+            host: Host name or IP address
+            port: Port number
+
+        Returns:
+            getaddrinfo() results; raises socket.gaierror if the host cannot be resolved
+        """
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        try:
+            addresses = socket.getaddrinfo(host, port, socket.AF_UNSPEC, socket.SOCK_STREAM)
+        except socket.gaierror:
+            if entry is not None:
+                logger.warning(f"DNS lookup for {host} failed, using cached addresses")
+                return entry[1]
+            raise
+
+        with self._lock:
+            self._entries[key] = (now + self.ttl, addresses)
+        return addresses
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get cache hit and miss counts
+
+        Returns:
+            Dictionary with hits, misses and cached hosts
+        """
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'hosts': len(self._entries)}
+
+
+class _HostStats:
+    """
+    Request and connection counters for one host
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.new_connections = 0
+        self._lock = threading.Lock()
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def count_connection(self) -> None:
+        with self._lock:
+            self.new_connections += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            reused = max(self.requests - self.new_connections, 0)
+            return {
+                'requests': self.requests,
+                'new_connections': self.new_connections,
+                'reused_connections': reused,
+                'reuse_ratio': round(reused / self.requests, 4) if self.requests else None,
+            }
+
+
+class _TunedConnectionMixin:
+    """
+    Opens connections through the DNS cache and counts them
+
+    The cached addresses are tried in order; TLS still verifies and sends
+    SNI for the original host name.
+    """
+
+    dns_cache: Optional[DNSCache] = None
+    host_stats: Optional[_HostStats] = None
+
+    def _new_conn(self) -> socket.socket:
+        if self.host_stats is not None:
+            self.host_stats.count_connection()
+        if self.dns_cache is None:
+            return super()._new_conn()
+
+        host = self._dns_host
+        try:
+            addresses = self.dns_cache.resolve(host, self.port)
+        except socket.gaierror:
+            # Let urllib3 raise its usual name resolution error
+            return super()._new_conn()
+
+        error = None
+        try:
+            for _, _, _, _, sockaddr in addresses:
+                self._dns_host = sockaddr[0]
+                try:
+                    return super()._new_conn()
+                except (NewConnectionError, ConnectTimeoutError) as e:
+                    error = e
+        finally:
+            self._dns_host = host
+        if error is None:
+            return super()._new_conn()
+        raise error
+
+
+class _TunedHTTPConnection(_TunedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TunedHTTPSConnection(_TunedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TunedHTTPAdapter(HTTPAdapter):
+    """
+    HTTP adapter with TCP keep-alive, cached DNS and connection reuse counters
+    """
+
+    def __init__(self, pool_connections: int = 4, pool_maxsize: int = 16, pool_block: bool = False,
+                 keepalive: float = 60, dns_cache: Optional[DNSCache] = None):
+        """
+        Initialize the adapter
+
+        Args:
+            pool_connections: Number of host pools kept
+            pool_maxsize: Maximum idle connections kept per host
+            pool_block: Wait for a free connection instead of opening extra ones when the pool is full
+            keepalive: Idle seconds before TCP keep-alive probes are sent; 0 disables them
+            dns_cache: DNSCache used for new connections, or None to resolve every time
+        """
+        self.keepalive = keepalive
+        self.dns_cache = dns_cache
+        self.stats = _HostStats()
+        super().__init__(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                         pool_block=pool_block)
+
+    def _socket_options(self) -> List[Tuple[int, int, int]]:
+        options = list(HTTPConnection.default_socket_options)
+        if self.keepalive > 0:
+            options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+            # Not every platform exposes the keep-alive timings
+            idle = max(int(self.keepalive), 1)
+            if hasattr(socket, 'TCP_KEEPIDLE'):
+                options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle))
+            if hasattr(socket, 'TCP_KEEPINTVL'):
+                options.append((socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, max(idle // 4, 1)))
+            if hasattr(socket, 'TCP_KEEPCNT'):
+                options.append((socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 4))
+        return options
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        pool_kwargs.setdefault('socket_options', self._socket_options())
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+
+        attributes = {'dns_cache': self.dns_cache, 'host_stats': self.stats}
+        http_connection = type('HTTPConnection', (_TunedHTTPConnection,), attributes)
+        https_connection = type('HTTPSConnection', (_TunedHTTPSConnection,), attributes)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': type('HTTPConnectionPool', (HTTPConnectionPool,), {'ConnectionCls': http_connection}),
+            'https': type('HTTPSConnectionPool', (HTTPSConnectionPool,), {'ConnectionCls': https_connection}),
+        }
+
+    def send(self, request, **kwargs):
+        self.stats.count_request()
+        return super().send(request, **kwargs)
+
+
+def _host_key(base_url: str) -> str:
+    """
+    Get the scheme, host and port a URL connects to
+
+    Args:
+        base_url: URL of the API
+
+    Returns:
+        Key such as "https://api.tnz.co.nz:443"
+    """
+    parts = urlsplit(base_url)
+    scheme = (parts.scheme or 'http').lower()
+    port = parts.port or (443 if scheme == 'https' else 80)
+    return f"{scheme}://{(parts.hostname or '').lower()}:{port}"
+
+
+_adapters: Dict[str, TunedHTTPAdapter] = {}
+_dns_cache: Optional[DNSCache] = None
+_adapters_lock = threading.Lock()
+
+
+def _get_dns_cache() -> Optional[DNSCache]:
+    """
+    Get the process-wide DNS cache
+
+    Returns:
+        DNSCache or None if HTTP_DNS_CACHE_SECONDS is 0
+    """
+    global _dns_cache
+
+    ttl = float(os.environ.get('HTTP_DNS_CACHE_SECONDS', '300'))
+    if ttl <= 0:
+        return None
+    if _dns_cache is None:
+        _dns_cache = DNSCache(ttl)
+    return _dns_cache
+
+
+def _get_adapter(base_url: str) -> TunedHTTPAdapter:
+    """
+    Get the process-wide pooled adapter for the host of a URL
+
+    Pool settings are read when a host's adapter is created:
+    HTTP_POOL_MAXSIZE idle connections per host (defaults to WEB_THREADS,
+    itself default 32, so every request thread can keep a warm connection),
+    HTTP_POOL_BLOCK (default false), HTTP_KEEPALIVE_SECONDS (default 60,
+    0 disables TCP keep-alive) and HTTP_DNS_CACHE_SECONDS (default 300,
+    0 disables DNS caching).
+
+    Args:
+        base_url: URL of the API
+
+    Returns:
+        Shared TunedHTTPAdapter
+    """
+    key = _host_key(base_url)
+    with _adapters_lock:
+        adapter = _adapters.get(key)
+        if adapter is None:
+            adapter = TunedHTTPAdapter(
+                pool_maxsize=int(os.environ.get('HTTP_POOL_MAXSIZE') or os.environ.get('WEB_THREADS', '32')),
+                pool_block=os.environ.get('HTTP_POOL_BLOCK', 'false').lower() == 'true',
+                keepalive=float(os.environ.get('HTTP_KEEPALIVE_SECONDS', '60')),
+                dns_cache=_get_dns_cache()
+            )
+            _adapters[key] = adapter
+            logger.info(f"Created pooled HTTP adapter for {key}")
+        return adapter
+
+
+def get_session(base_url: str) -> requests.Session:
+    """
+    Create a session that uses the pooled connections of a URL's host
+
+    Each client gets its own session, so cookies and other session state
+    never leak between sites with different credentials, while the adapter
+    and its connection pool are shared by every client of the host, so
+    calls reuse warm TCP/TLS connections.
+
+    Args:
+        base_url: URL of the API
+
+    Returns:
+        New requests.Session mounted with the host's shared adapter
+    """
+    adapter = _get_adapter(base_url)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def transport_stats() -> Dict[str, Any]:
+    """
+    Get connection reuse statistics for every pooled host
+
+    Returns:
+        Dictionary with per-host request and connection counts and DNS cache hits
+    """
+    with _adapters_lock:
+        hosts = {key: adapter.stats.to_dict() for key, adapter in _adapters.items()}
+    return {
+        'hosts': hosts,
+        'dns_cache': _dns_cache.stats() if _dns_cache is not None else None,
+    }
+
+
+def close_sessions() -> None:
+    """
+    Close every pooled adapter and its connections
+    """
+    with _adapters_lock:
+        for adapter in _adapters.values():
+            adapter.close()
+        _adapters.clear()
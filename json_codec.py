@@ -0,0 +1,108 @@
+import json
+import logging
+import os
+from typing import Any, Callable, Dict, Tuple, Union
+
+logger = logging.getLogger('json_codec')
+
+
+def _stdlib_codec() -> Tuple[Callable[[Any], bytes], Callable[[Union[bytes, str]], Any]]:
+    def encode(obj: Any) -> bytes:
+        return json.dumps(obj, separators=(',', ':'), default=str).encode('utf-8')
+
+    return encode, json.loads
+
+
+def _orjson_codec() -> Tuple[Callable[[Any], bytes], Callable[[Union[bytes, str]], Any]]:
+    import orjson
+
+    options = orjson.OPT_NON_STR_KEYS
+
+    def encode(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=str, option=options)
+
+    # orjson.JSONDecodeError is a ValueError subclass
+    return encode, orjson.loads
+
+
+def _msgspec_codec() -> Tuple[Callable[[Any], bytes], Callable[[Union[bytes, str]], Any]]:
+    import msgspec
+
+    encoder = msgspec.json.Encoder(enc_hook=str)
+    decoder = msgspec.json.Decoder()
+
+    def decode(data: Union[bytes, str]) -> Any:
+        try:
+            return decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+
+    return encoder.encode, decode
+
+
+BACKENDS: Dict[str, Callable] = {
+    'orjson': _orjson_codec,
+    'msgspec': _msgspec_codec,
+    'stdlib': _stdlib_codec,
+}
+
+
+def load_backend(name: str = None) -> Tuple[str, Callable[[Any], bytes], Callable[[Union[bytes, str]], Any]]:
+    """
+    Load a JSON backend
+
+    Args:
+        name: Backend name ("orjson", "msgspec", "stdlib") or "auto"/None for the
+              fastest installed backend
+
+    Returns:
+        Tuple of (backend name, encode function, decode function)
+    """
+    name = (name or 'auto').lower()
+    candidates = list(BACKENDS) if name == 'auto' else [name, 'stdlib']
+    for candidate in candidates:
+        factory = BACKENDS.get(candidate)
+        if factory is None:
+            logger.warning(f"Unknown JSON backend '{candidate}'")
+            continue
+        try:
+            encode, decode = factory()
+            return candidate, encode, decode
+        except ImportError:
+            if name != 'auto':
+                logger.warning(f"JSON backend '{candidate}' is not installed, falling back to stdlib")
+    # stdlib is always importable
+    encode, decode = _stdlib_codec()
+    return 'stdlib', encode, decode
+
+
+BACKEND, _encode, _decode = load_backend(os.environ.get('JSON_CODEC'))
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Encode an object as compact UTF-8 JSON
+
+    Args:
+        obj: Object to encode; unknown types are encoded with str()
+
+    Returns:
+        JSON document as bytes
+    """
+    return _encode(obj)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Decode a JSON document
+
+    Args:
+        data: JSON document as bytes or str
+
+    Returns:
+        Decoded object
+
+    Raises:
+        ValueError: If the document is not valid JSON
+    """
+    return _decode(data)
@@ -1,15 +1,26 @@
 import os
 import logging
-import datetime
+import time
 import json
-from typing import Dict, Any, Optional, List, Union, cast
-from flask import Flask, render_template, request, jsonify, flash, redirect, url_for
-import requests
-from datetime import datetime, timedelta
+from typing import Any, Union
+from flask import Flask, render_template, request, jsonify, flash, redirect, url_for, g
+from flask.json.provider import JSONProvider
+from datetime import datetime
 
-from eds_client import EDSClient
-from tnz_client import TNZClient
 from alarm_processor import AlarmProcessor
+from shared_clients import get_eds_poller, get_tnz_client, reset_clients
+from coordination import create_coordinator, query_shard_alarms
+from notification_queue import get_scheduler
+from config_utils import parse_bool
+from contact_store import get_contact_store, load_env_contacts, normalize_number
+from notification_audit import get_audit_log
+from suppression import get_suppression_store
+import json_codec
+from alarm_view import AlarmSnapshotCache, decode_cursor, encode_cursor, page_after, public_fields, view_key
+from compression import compress_response
+from canary import get_canary
+from http_transport import transport_stats
+from tracing import annotate, profiled, span
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -31,9 +42,86 @@ def load_settings():
 # Load settings on startup
 load_settings()
 
+class CodecJSONProvider(JSONProvider):
+    """
+    Flask JSON provider that encodes and decodes through json_codec
+    """
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        return json_codec.dumps(obj).decode('utf-8')
+    
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return json_codec.loads(s)
+    
+    def response(self, *args: Any, **kwargs: Any):
+        # Skip the bytes -> str -> bytes round trip of the default implementation
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(json_codec.dumps(obj), mimetype='application/json')
+
 # Create Flask app
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
+app.json = CodecJSONProvider(app)
+logger.info(f"Using {json_codec.BACKEND} JSON backend")
+
+# Compress large responses for clients that accept gzip or brotli
+@app.after_request
+def compress(response):
+    return compress_response(response, request.headers.get('Accept-Encoding', ''))
+
+# Trace every request; with PROFILING_ENABLED, ?profile=1 also profiles it
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', 'false').lower() == 'true'
+
+@app.before_request
+def start_trace():
+    if request.endpoint == 'static':
+        return
+    g.trace = span(f"{request.method} {request.endpoint or request.path}", root=True, path=request.path)
+    g.trace_span = g.trace.__enter__()
+    if PROFILING_ENABLED and request.args.get('profile') == '1':
+        g.profile = profiled(f"web-{request.endpoint}")
+        g.profile_path = g.profile.__enter__()
+
+@app.after_request
+def annotate_trace(response):
+    annotate(status=response.status_code)
+    # Mark server errors so summarize_traces counts them, including handled ones
+    trace_span = g.get('trace_span')
+    if trace_span is not None and response.status_code >= 500 and trace_span.error is None:
+        trace_span.error = f"HTTP {response.status_code}"
+    if g.get('profile_path'):
+        response.headers['X-Profile-Output'] = g.profile_path
+    return response
+
+@app.teardown_request
+def end_trace(error):
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profile.__exit__(None, None, None)
+    trace = g.pop('trace', None)
+    trace_span = g.pop('trace_span', None)
+    if trace is not None:
+        if error is not None:
+            annotate(error=str(error))
+            if trace_span is not None:
+                trace_span.error = f"{type(error).__name__}: {str(error)}"
+        trace.__exit__(None, None, None)
+
+# Shard leases shared with other web and function instances (None if disabled)
+coordinator = create_coordinator()
+
+# Background EDS/TNZ checks that /api/status reports from (None unless
+# CANARY_INTERVAL_SECONDS is set)
+canary = get_canary()
+
+# Alarm query results kept briefly so dashboard pages do not re-query EDS
+ALARMS_PAGE_SIZE = int(os.environ.get('ALARMS_PAGE_SIZE', '100'))
+ALARMS_MAX_PAGE_SIZE = 1000
+alarm_snapshots = AlarmSnapshotCache(ttl=float(os.environ.get('ALARMS_CACHE_SECONDS', '30')))
+
+
+class EDSQueryError(Exception):
+    """Raised when no EDS site could be queried"""
 
 # Main dashboard
 @app.route('/')
@@ -50,39 +138,31 @@ def index():
 @app.route('/api/status')
 def api_status():
     eds_status = False
+    eds_sites = {}
     tnz_status = False
+    canary_status = canary.status() if canary else None
+    targets = canary_status['targets'] if canary_status else {}
     
     try:
-        # Check EDS API status - handle None values with defaults
-        base_url = os.environ.get('EDS_API_BASE_URL')
-        username = os.environ.get('EDS_API_USERNAME')
-        password = os.environ.get('EDS_API_PASSWORD')
-        
-        # Only proceed if we have the required values
-        if base_url and username and password:
-            eds_client = EDSClient(
-                base_url=base_url,
-                username=username,
-                password=password,
-            )
-            session_id = eds_client.login()
-            if session_id:
-                eds_status = True
-                eds_client.logout()
+        if any(t.startswith('eds:') for t in targets):
+            # Served from the background canary's latest results
+            eds_sites = {t[len('eds:'):]: r.get('ok', False) for t, r in targets.items() if t.startswith('eds:')}
+        else:
+            # Check EDS API status of every site using the shared, pooled sessions
+            eds_poller = get_eds_poller()
+            if eds_poller is not None:
+                eds_sites = eds_poller.login_all()
+        eds_status = any(eds_sites.values())
     except Exception as e:
         logger.error(f"Error checking EDS API status: {str(e)}")
     
     try:
-        # Check TNZ API status (just verifying API key format for demo)
-        api_key = os.environ.get('TNZ_API_KEY')
-        if api_key:
-            tnz_client = TNZClient(
-                base_url=os.environ.get('TNZ_API_BASE_URL', 'https://api.tnz.co.nz/api/v1'),
-                api_key=api_key
-            )
-            # For actual status check, we would need to make an API call
-            # This is just checking if the API key is set and has reasonable length
-            if len(api_key) > 5:
+        if 'tnz' in targets:
+            tnz_status = targets['tnz'].get('ok', False)
+        else:
+            # No canary result yet: just verify the API key is configured
+            api_key = os.environ.get('TNZ_API_KEY')
+            if api_key and get_tnz_client() is not None and len(api_key) > 5:
                 tnz_status = True
     except Exception as e:
         logger.error(f"Error checking TNZ API status: {str(e)}")
@@ -90,82 +170,73 @@ def api_status():
     return jsonify({
         'eds_api': {
             'status': 'connected' if eds_status else 'disconnected',
-            'base_url': os.environ.get('EDS_API_BASE_URL', 'Not configured')
+            'base_url': os.environ.get('EDS_API_BASE_URL', 'Not configured'),
+            'sites': {name: 'connected' if ok else 'disconnected' for name, ok in eds_sites.items()}
         },
         'tnz_api': {
             'status': 'connected' if tnz_status else 'disconnected',
             'base_url': os.environ.get('TNZ_API_BASE_URL', 'Not configured')
-        }
+        },
+        'canary': canary_status,
+        'transport': transport_stats()
     })
 
 # Get recent alarms
 @app.route('/api/alarms')
 def get_alarms():
     try:
-        # Get environment variables and validate
-        base_url = os.environ.get('EDS_API_BASE_URL')
-        username = os.environ.get('EDS_API_USERNAME')
-        password = os.environ.get('EDS_API_PASSWORD')
-        
-        if not all([base_url, username, password]):
+        # Shared poller querying every EDS site, logging in only when needed
+        eds_poller = get_eds_poller()
+        if eds_poller is None:
             return jsonify({'error': 'EDS API credentials not configured'}), 500
-            
-        # Initialize EDS client
-        eds_client = EDSClient(
-            base_url=base_url,
-            username=username,
-            password=password,
-        )
         
-        # Login to EDS API
-        session_id = eds_client.login()
-        if not session_id:
-            return jsonify({'error': 'Failed to login to EDS API'}), 500
+        # Get minutes from query parameters, default to 60
+        minutes = int(request.args.get('minutes', 60))
+        # Limit minutes to a reasonable range
+        minutes = min(max(minutes, 5), 1440)  # Between 5 minutes and 24 hours
+        
+        # Get priority from query parameters, default to all priorities [1, 2, 3]
+        priority_param = request.args.get('priority', '1,2,3')
+        priorities = [int(p) for p in priority_param.split(',') if p.isdigit()]
+        
+        # Paging, sorting and filtering
+        limit = min(max(int(request.args.get('limit', ALARMS_PAGE_SIZE)), 1), ALARMS_MAX_PAGE_SIZE)
+        sort = request.args.get('sort', 'priority')
+        sources = [s for s in request.args.get('zd', '').split(',') if s]
+        qualities = [q for q in request.args.get('quality', '').split(',') if q]
+        cursor = decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+        
+        def fetch_alarms():
+            # Query alarms from all sites in parallel
+            alarms, errors = eds_poller.query_alarms_result(minutes=minutes, priorities=priorities)
+            if errors and len(errors) == len(eds_poller.clients):
+                raise EDSQueryError('; '.join(f"{name}: {error}" for name, error in errors.items()))
+            return alarms
         
         try:
-            # Get minutes from query parameters, default to 60
-            minutes = int(request.args.get('minutes', 60))
-            # Limit minutes to a reasonable range
-            minutes = min(max(minutes, 5), 1440)  # Between 5 minutes and 24 hours
-            
-            # Get priority from query parameters, default to all priorities [1, 2, 3]
-            priority_param = request.args.get('priority', '1,2,3')
-            priorities = [int(p) for p in priority_param.split(',') if p.isdigit()]
-            
-            # Query alarms
-            alarms = eds_client.query_alarms(minutes=minutes, priorities=priorities)
-            
-            # Format alarms for display
-            formatted_alarms = []
-            for alarm in alarms:
-                # Format timestamp
-                ts = alarm.get('ts')
-                if ts:
-                    formatted_time = datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
-                else:
-                    formatted_time = "Unknown"
-                
-                # Get priority string
-                priority_map = {1: "HIGH", 2: "MEDIUM", 3: "LOW"}
-                priority = priority_map.get(alarm.get('ap'), "UNKNOWN")
-                
-                formatted_alarms.append({
-                    'id': alarm.get('sid'),
-                    'name': alarm.get('iess', 'Unknown'),
-                    'description': alarm.get('desc', ''),
-                    'priority': priority,
-                    'value': alarm.get('value', 'N/A'),
-                    'timestamp': formatted_time,
-                    'quality': alarm.get('quality', 'UNKNOWN'),
-                    'source': alarm.get('zd', 'Unknown')
-                })
-            
-            return jsonify({'alarms': formatted_alarms})
-            
-        finally:
-            # Always logout
-            eds_client.logout()
-            
+            snapshot = alarm_snapshots.get_snapshot((minutes, tuple(sorted(priorities))), fetch_alarms)
+        except EDSQueryError as e:
+            return jsonify({'error': f'Failed to query EDS API: {str(e)}'}), 500
+        
+        # Keyset paging: the cursor holds the sort key of the last alarm sent, so the
+        # next page can be served by any worker from its own copy of the query result
+        key = view_key(sort, sources, qualities)
+        if cursor and cursor['v'] != key:
+            raise ValueError("cursor belongs to a different sort or filter")
+        view = alarm_snapshots.get_view(snapshot, sort, sources, qualities)
+        offset, page, last_key = page_after(view, sort, cursor['k'] if cursor else None, limit)
+        next_cursor = encode_cursor(key, last_key) if last_key is not None else None
+        
+        return jsonify({
+            'alarms': [public_fields(alarm) for alarm in page],
+            'total': len(view),
+            'offset': offset,
+            'next_cursor': next_cursor,
+            'sites': eds_poller.site_status
+        })
+        
+    except ValueError as e:
+        return jsonify({'error': f'Invalid request: {str(e)}'}), 400
     except Exception as e:
         logger.error(f"Error fetching alarms: {str(e)}")
         return jsonify({'error': str(e)}), 500
@@ -174,75 +245,232 @@ def get_alarms():
 @app.route('/api/check-alarms', methods=['POST'])
 def check_alarms():
     try:
-        # Get and validate credentials
-        base_url = os.environ.get('EDS_API_BASE_URL')
-        username = os.environ.get('EDS_API_USERNAME')
-        password = os.environ.get('EDS_API_PASSWORD')
-        api_key = os.environ.get('TNZ_API_KEY')
-        
-        if not all([base_url, username, password]):
+        eds_poller = get_eds_poller()
+        if eds_poller is None:
             return jsonify({'error': 'EDS API credentials not configured'}), 500
             
-        if not api_key:
+        tnz_client = get_tnz_client()
+        if tnz_client is None:
             return jsonify({'error': 'TNZ API key not configured'}), 500
         
-        # Initialize clients
-        eds_client = EDSClient(
-            base_url=base_url,
-            username=username,
-            password=password,
-        )
-        
-        tnz_client = TNZClient(
-            base_url=os.environ.get('TNZ_API_BASE_URL', 'https://api.tnz.co.nz/api/v1'),
-            api_key=api_key
-        )
-        
         processor = AlarmProcessor(
             notification_threshold=int(os.environ.get('ALARM_NOTIFICATION_THRESHOLD', '2')),
             last_run_minutes=int(os.environ.get('LAST_RUN_MINUTES', '15'))
         )
         
-        # Login to EDS API
-        session_id = eds_client.login()
-        if not session_id:
-            return jsonify({'error': 'Failed to login to EDS API'}), 500
-        
+        # Dry runs send nothing, so they query every shard without taking leases.
+        # Sending runs hold the shard leases only for this check and release them
+        # afterwards, so the timer poller is not locked out until they expire.
+        send_sms = parse_bool((request.get_json(silent=True) or {}).get('send_sms', False))
+        use_leases = send_sms and coordinator is not None
+        shards = coordinator.acquire_shards() if use_leases else [None]
         try:
-            # Query alarms
-            alarms = eds_client.query_alarms()
+            if not shards:
+                return jsonify({
+                    'success': False,
+                    'message': 'Alarms are currently polled by another instance'
+                })
             
-            # Process alarms
-            notifications = processor.process_alarms(alarms)
+            # Query alarms from all sites in parallel
+            alarms = []
+            with span('query_alarms', shards=len(shards)):
+                for shard in shards:
+                    alarms.extend(query_shard_alarms(eds_poller, shard))
+            if eds_poller.last_error and not any(s.get('ok') for s in eds_poller.site_status.values()):
+                return jsonify({'error': f'Failed to query EDS API: {eds_poller.last_error}'}), 500
+            
+            # Process alarms; dry runs leave the suppression and audit logs alone
+            with span('process_alarms', alarms=len(alarms)):
+                notifications = processor.process_alarms(alarms, record_suppressed=send_sms)
             
             # Send SMS notifications if enabled
-            send_sms = request.json.get('send_sms', False)
             sent_count = 0
             
             if send_sms and notifications:
-                for notification in notifications:
-                    result = tnz_client.send_sms(
-                        to=notification['recipient'],
-                        message=notification['message']
-                    )
-                    if result:
-                        sent_count += 1
-            
-            return jsonify({
-                'success': True,
-                'alarms_processed': len(alarms),
-                'notifications_generated': len(notifications),
-                'sms_sent': sent_count if send_sms else 'Disabled'
-            })
-            
+                # Send through the shared priority queue so HIGH alarms go first
+                with span('send_notifications', notifications=len(notifications)):
+                    scheduler = get_scheduler()
+                    scheduler.submit(notifications)
+                    sent_count = sum(1 for _, result in scheduler.drain(tnz_client) if result)
         finally:
-            # Always logout
-            eds_client.logout()
-            
+            if use_leases:
+                coordinator.release_all()
+        
+        return jsonify({
+            'success': True,
+            'alarms_processed': len(alarms),
+            'notifications_generated': len(notifications),
+            'sms_sent': sent_count if send_sms else 'Disabled'
+        })
+        
     except Exception as e:
         logger.error(f"Error checking alarms: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+# Send queue statistics
+@app.route('/api/send-queue')
+def send_queue_stats():
+    queue = get_scheduler().queue
+    return jsonify({
+        'depth': len(queue),
+        'priorities': queue.stats()
+    })
+
+# Contact directory
+@app.route('/api/contacts', methods=['GET', 'POST'])
+def contacts_collection():
+    contact_store = get_contact_store()
+    if contact_store is None:
+        return jsonify({'error': 'Contact store not available'}), 500
+    
+    try:
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            contact = contact_store.add_contact(
+                name=data.get('name'),
+                number=data.get('number'),
+                contact_group=data.get('contact_group'),
+                on_call=parse_bool(data.get('on_call', False)),
+                active=parse_bool(data.get('active', True))
+            )
+            return jsonify(contact), 201
+        
+        # Filter by number, group and on-call status (all indexed)
+        if request.args.get('number'):
+            contact = contact_store.find_by_number(request.args['number'])
+            return jsonify({'contacts': [contact] if contact else []})
+        
+        on_call = request.args.get('on_call')
+        contacts = contact_store.list_contacts(
+            contact_group=request.args.get('group'),
+            on_call=on_call.lower() in ('1', 'true', 'yes') if on_call is not None else None
+        )
+        return jsonify({'contacts': contacts})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/contacts/<int:contact_id>', methods=['GET', 'PUT', 'DELETE'])
+def contact_item(contact_id):
+    contact_store = get_contact_store()
+    if contact_store is None:
+        return jsonify({'error': 'Contact store not available'}), 500
+    
+    try:
+        if request.method == 'DELETE':
+            if not contact_store.delete_contact(contact_id):
+                return jsonify({'error': 'Contact not found'}), 404
+            return jsonify({'success': True})
+        
+        if request.method == 'PUT':
+            contact = contact_store.update_contact(contact_id, **(request.get_json(silent=True) or {}))
+        else:
+            contact = contact_store.get_contact(contact_id)
+        
+        if contact is None:
+            return jsonify({'error': 'Contact not found'}), 404
+        return jsonify(contact)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/contacts/import', methods=['POST'])
+def import_contacts():
+    contact_store = get_contact_store()
+    if contact_store is None:
+        return jsonify({'error': 'Contact store not available'}), 500
+    
+    # Accept an uploaded CSV file or a raw text/csv body
+    upload = request.files.get('file')
+    text = upload.read().decode('utf-8-sig') if upload else request.get_data(as_text=True)
+    if not text.strip():
+        return jsonify({'error': 'No CSV data provided'}), 400
+    
+    return jsonify(contact_store.import_csv(text))
+
+@app.route('/api/suppressions', methods=['GET', 'POST'])
+def suppressions_collection():
+    suppression_store = get_suppression_store()
+    if suppression_store is None:
+        return jsonify({'error': 'Suppression store not available'}), 500
+    
+    try:
+        if request.method == 'POST':
+            data = request.get_json(silent=True) or {}
+            window = suppression_store.add_window(
+                name=data.get('name'),
+                start=data.get('start'),
+                end=data.get('end'),
+                kind=data.get('kind', 'once'),
+                zd=data.get('zd'),
+                iess_pattern=data.get('iess_pattern'),
+                contact=data.get('contact'),
+                min_priority=data.get('min_priority', 1),
+                reason=data.get('reason')
+            )
+            return jsonify(window), 201
+        
+        include_expired = request.args.get('include_expired', '').lower() in ('1', 'true', 'yes')
+        return jsonify({'windows': suppression_store.list_windows(include_expired=include_expired)})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@app.route('/api/suppressions/<int:window_id>', methods=['DELETE'])
+def suppression_item(window_id):
+    suppression_store = get_suppression_store()
+    if suppression_store is None:
+        return jsonify({'error': 'Suppression store not available'}), 500
+    
+    if not suppression_store.delete_window(window_id):
+        return jsonify({'error': 'Suppression window not found'}), 404
+    return jsonify({'success': True})
+
+@app.route('/api/suppressions/log')
+def suppression_log():
+    suppression_store = get_suppression_store()
+    if suppression_store is None:
+        return jsonify({'error': 'Suppression store not available'}), 500
+    
+    try:
+        hours = float(request.args.get('hours', 24))
+        limit = min(max(int(request.args.get('limit', 100)), 1), 1000)
+    except ValueError:
+        return jsonify({'error': 'hours and limit must be numbers'}), 400
+    
+    records = suppression_store.list_suppressed(since=time.time() - hours * 3600, limit=limit)
+    return jsonify({'suppressed': records})
+
+@app.route('/api/notifications')
+def notification_audit():
+    audit_log = get_audit_log()
+    if audit_log is None:
+        return jsonify({'error': 'Notification audit log not enabled'}), 500
+    
+    try:
+        contact = request.args.get('contact')
+        if contact:
+            contact = normalize_number(contact, os.environ.get('DEFAULT_COUNTRY_CODE', '64'))
+        sid = request.args.get('sid')
+        since = request.args.get('since')
+        until = request.args.get('until')
+        records = audit_log.query(
+            sid=int(sid) if sid else None,
+            site=request.args.get('site'),
+            contact=contact,
+            event=request.args.get('event'),
+            since=_parse_time_param(since) if since else None,
+            until=_parse_time_param(until) if until else None,
+            limit=min(max(int(request.args.get('limit', 100)), 1), 1000)
+        )
+        return jsonify({'notifications': records})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+def _parse_time_param(value: str) -> float:
+    """Parse a Unix timestamp or ISO date and time query parameter"""
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
 # Configuration page
 @app.route('/config')
 def config():
@@ -259,14 +487,9 @@ def config():
     eds_password_masked = '********' if os.environ.get('EDS_API_PASSWORD') else ''
     tnz_api_key_masked = '********' if os.environ.get('TNZ_API_KEY') else ''
     
-    # Get contact list
-    contacts = []
-    contact_list_str = os.environ.get('CONTACT_LIST', '[]')
-    try:
-        contacts = json.loads(contact_list_str)
-    except (json.JSONDecodeError, TypeError):
-        logger.warning("Invalid contact list format in environment variables")
-        contacts = []
+    # Get contact list from the contact store
+    contact_store = get_contact_store()
+    contacts = contact_store.list_contacts() if contact_store else load_env_contacts()
     
     return render_template('config.html', 
                           configs=configs, 
@@ -305,6 +528,12 @@ def save_config():
                     'number': contact_numbers[i].strip()
                 })
         
+        # Save contacts to the contact store; numbers are normalised and
+        # de-duplicated, and invalid numbers abort the save
+        contact_store = get_contact_store()
+        if contact_store is not None:
+            contact_store.replace_all(contacts)
+        
         # Update the settings.json file
         settings = {}
         
@@ -327,7 +556,8 @@ def save_config():
         settings['Values']['TNZ_API_BASE_URL'] = tnz_api_base_url
         settings['Values']['ALARM_NOTIFICATION_THRESHOLD'] = alarm_notification_threshold
         settings['Values']['LAST_RUN_MINUTES'] = last_run_minutes
-        settings['Values']['CONTACT_LIST'] = json.dumps(contacts)
+        if contact_store is None:
+            settings['Values']['CONTACT_LIST'] = json.dumps(contacts)
         
         # Only update password and API key if provided
         if eds_api_password and len(eds_api_password.strip()) > 0 and '********' not in eds_api_password:
@@ -347,7 +577,8 @@ def save_config():
         os.environ['TNZ_API_BASE_URL'] = tnz_api_base_url
         os.environ['ALARM_NOTIFICATION_THRESHOLD'] = alarm_notification_threshold
         os.environ['LAST_RUN_MINUTES'] = last_run_minutes
-        os.environ['CONTACT_LIST'] = json.dumps(contacts)
+        if contact_store is None:
+            os.environ['CONTACT_LIST'] = json.dumps(contacts)
         
         # Update password and API key in environment if provided
         if eds_api_password and len(eds_api_password.strip()) > 0 and '********' not in eds_api_password:
@@ -362,6 +593,9 @@ def save_config():
             
         if 'TNZ_API_KEY' in settings['Values'] and 'TNZ_API_KEY' not in os.environ:
             os.environ['TNZ_API_KEY'] = settings['Values']['TNZ_API_KEY']
+        
+        # Rebuild the shared API clients with the new settings
+        reset_clients()
             
         # Log current environment variables (for debugging)
         logger.info(f"After save - EDS API Base URL: {os.environ.get('EDS_API_BASE_URL')}")
@@ -375,4 +609,5 @@ def save_config():
     return redirect(url_for('config'))
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # Development server only; use gunicorn with gunicorn.conf.py in production
+    app.run(host='0.0.0.0', port=5000, debug=True, threaded=True)
\ No newline at end of file
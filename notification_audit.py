@@ -0,0 +1,313 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+import json_codec
+
+logger = logging.getLogger('notification_audit')
+
+# Notification fields copied into audit records; the message text is left
+# out because it can be rebuilt from the alarm and dominates record size
+NOTIFICATION_FIELDS = ('alarm_id', 'site', 'priority', 'recipient', 'contact_name')
+EVENTS = ('queued', 'suppressed', 'sent', 'failed')
+
+INDEX_FILE = 'index.db'
+SEGMENT_PREFIX = 'audit-'
+SEGMENT_SUFFIX = '.jsonl'
+
+
+class NotificationAuditLog:
+    """
+    Append-only audit log of notification decisions and send results
+
+    Records are JSON lines appended to segment files that are rotated by
+    size and named by creation time and process, so several workers can
+    share one directory without interleaving writes. A SQLite index maps
+    alarm, contact and time to each record's segment and byte offset, so
+    lookups read only the matching lines. Records are written by a
+    background thread; record() only queues them, keeping the send path
+    free of disk I/O.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 8 * 1024 * 1024,
+                 retention_days: float = 0, batch_size: int = 500):
+        """
+        Initialize the audit log
+
+        Args:
+            directory: Directory holding the segments and index
+            segment_bytes: Size after which a new segment is started
+            retention_days: Days segments are kept for; 0 keeps them forever
+            batch_size: Maximum number of records written per batch
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.retention_days = retention_days
+        self.batch_size = batch_size
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " ts REAL NOT NULL,"
+                " event TEXT NOT NULL,"
+                " site TEXT,"
+                " sid INTEGER,"
+                " contact TEXT,"
+                " segment TEXT NOT NULL,"
+                " position INTEGER NOT NULL,"
+                " length INTEGER NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS idx_entries_ts ON entries (ts);"
+                "CREATE INDEX IF NOT EXISTS idx_entries_sid ON entries (sid, ts);"
+                "CREATE INDEX IF NOT EXISTS idx_entries_contact ON entries (contact, ts);"
+                "CREATE INDEX IF NOT EXISTS idx_entries_segment ON entries (segment);"
+            )
+
+        self._segment: Optional[str] = None
+        self._segment_count = 0
+        self._file = None
+        self._queue: 'queue.Queue[Optional[Dict[str, Any]]]' = queue.Queue()
+        self._writer = threading.Thread(target=self._run, name='notification-audit', daemon=True)
+        self._writer.start()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Open an index connection that commits on success and is always closed
+        """
+        conn = sqlite3.connect(self.index_path, timeout=10)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def record(self, event: str, notification: Optional[Dict[str, Any]] = None, **fields) -> None:
+        """
+        Queue an audit record; returns immediately
+
+        Args:
+            event: One of "queued", "suppressed", "sent" or "failed"
+            notification: Notification object from AlarmProcessor, if any
+            **fields: Extra fields such as message_id, latency_ms, error or window
+        """
+        entry = {'ts': time.time(), 'event': event}
+        if notification:
+            entry.update({k: notification[k] for k in NOTIFICATION_FIELDS if notification.get(k) is not None})
+        entry.update({k: v for k, v in fields.items() if v is not None})
+        self._queue.put(entry)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every queued record has been written
+
+        Args:
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            True if the queue was drained, False if the timeout expired first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """
+        Write queued records and stop the writer thread
+
+        Args:
+            timeout: Maximum seconds to wait for the writer, or None to wait indefinitely
+        """
+        self._queue.put(None)
+        self._writer.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            entry = self._queue.get()
+            if entry is None:
+                self._queue.task_done()
+                break
+            batch = [entry]
+            while len(batch) < self.batch_size:
+                try:
+                    entry = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if entry is None:
+                    # Put the stop marker back so it ends the loop after this batch
+                    self._queue.task_done()
+                    self._queue.put(None)
+                    break
+                batch.append(entry)
+            try:
+                self._write(batch)
+            except Exception as e:
+                # Keep the writer alive: a dead writer would make flush() wait forever
+                logger.error(f"Error writing notification audit records: {str(e)}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+        if self._file is not None:
+            self._file.close()
+
+    def _open_segment(self) -> None:
+        if self._file is not None:
+            # Cleared first so a failed open below is retried on the next batch
+            # instead of writing to the closed file
+            self._file.close()
+            self._file = None
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        self._segment_count += 1
+        self._segment = f"{SEGMENT_PREFIX}{stamp}-{os.getpid()}-{self._segment_count}{SEGMENT_SUFFIX}"
+        self._file = open(os.path.join(self.directory, self._segment), 'ab')
+        self._prune_segments()
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        if self._file is None or self._file.tell() >= self.segment_bytes:
+            self._open_segment()
+
+        rows = []
+        offset = self._file.tell()
+        lines = []
+        for entry in batch:
+            line = json_codec.dumps(entry) + b'\n'
+            lines.append(line)
+            rows.append((entry['ts'], entry['event'], entry.get('site'), entry.get('alarm_id'),
+                         entry.get('recipient'), self._segment, offset, len(line)))
+            offset += len(line)
+
+        # Data first, then the index, so every indexed offset is readable
+        self._file.write(b''.join(lines))
+        self._file.flush()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT INTO entries (ts, event, site, sid, contact, segment, position, length) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def _prune_segments(self) -> None:
+        """
+        Delete segments older than the retention period, with their index entries
+        """
+        if not self.retention_days:
+            return
+        cutoff = time.time() - self.retention_days * 86400
+        for name in os.listdir(self.directory):
+            if not (name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)) or name == self._segment:
+                continue
+            path = os.path.join(self.directory, name)
+            if os.path.getmtime(path) < cutoff:
+                with self._connect() as conn:
+                    conn.execute("DELETE FROM entries WHERE segment = ?", (name,))
+                os.remove(path)
+                logger.info(f"Removed expired audit segment {name}")
+
+    def query(self, sid: int = None, site: str = None, contact: str = None, event: str = None,
+              since: float = None, until: float = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Look up audit records, newest first
+
+        Args:
+            sid: Only records for this alarm point ID
+            site: Only records for this EDS site
+            contact: Only records for this recipient number
+            event: Only records of this event type
+            since: Only records at or after this Unix timestamp
+            until: Only records before this Unix timestamp
+            limit: Maximum number of records
+
+        Returns:
+            List of audit records
+        """
+        conditions = []
+        params: List[Any] = []
+        for column, value in (('sid', sid), ('site', site), ('contact', contact), ('event', event)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("ts < ?")
+            params.append(until)
+
+        sql = "SELECT segment, position, length FROM entries"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY ts DESC LIMIT ?"
+        params.append(limit)
+
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        records = []
+        files = {}
+        try:
+            for segment, offset, length in rows:
+                if segment not in files:
+                    try:
+                        files[segment] = open(os.path.join(self.directory, segment), 'rb')
+                    except OSError:
+                        files[segment] = None
+                f = files[segment]
+                if f is None:
+                    continue
+                f.seek(offset)
+                try:
+                    records.append(json_codec.loads(f.read(length)))
+                except ValueError:
+                    logger.warning(f"Unreadable audit record in {segment} at {offset}")
+        finally:
+            for f in files.values():
+                if f is not None:
+                    f.close()
+        return records
+
+
+_audit_log: Optional[NotificationAuditLog] = None
+_audit_lock = threading.Lock()
+
+
+def get_audit_log() -> Optional[NotificationAuditLog]:
+    """
+    Get the process-wide notification audit log
+
+    The log is written to AUDIT_LOG_DIR (default audit_log); an empty
+    value disables auditing.
+
+    Returns:
+        NotificationAuditLog or None if auditing is disabled or the directory cannot be used
+    """
+    global _audit_log
+
+    directory = os.environ.get('AUDIT_LOG_DIR', 'audit_log')
+    if not directory:
+        return None
+
+    with _audit_lock:
+        if _audit_log is None:
+            try:
+                _audit_log = NotificationAuditLog(
+                    directory,
+                    segment_bytes=int(os.environ.get('AUDIT_SEGMENT_BYTES', str(8 * 1024 * 1024))),
+                    retention_days=float(os.environ.get('AUDIT_RETENTION_DAYS', '0'))
+                )
+            except (OSError, sqlite3.Error) as e:
+                logger.error(f"Error opening notification audit log: {str(e)}")
+                return None
+        return _audit_log
@@ -0,0 +1,212 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger('notification_queue')
+
+# Alarm priorities as used by EDS (1 = HIGH)
+HIGH_PRIORITY = 1
+LOWEST_PRIORITY = 3
+
+
+class PriorityNotificationQueue:
+    """
+    Thread-safe notification queue ordered by alarm priority with aging
+
+    HIGH priority notifications are always dequeued first. Lower priorities
+    gain one priority level for every aging_seconds they wait, but never
+    overtake HIGH, so they are not starved by a steady stream of MEDIUM
+    alarms.
+    """
+
+    def __init__(self, aging_seconds: float = 60.0):
+        """
+        Initialize the queue
+
+        Args:
+            aging_seconds: Wait time after which a notification is promoted one priority level
+        """
+        self.aging_seconds = aging_seconds
+        self._lock = threading.Lock()
+        self._queues: Dict[int, Deque[Tuple[float, Dict[str, Any]]]] = {}
+        self._stats: Dict[int, Dict[str, float]] = {}
+
+    def _priority_of(self, notification: Dict[str, Any]) -> int:
+        try:
+            priority = int(notification.get('priority'))
+        except (TypeError, ValueError):
+            return LOWEST_PRIORITY
+        return max(priority, HIGH_PRIORITY)
+
+    def put(self, notification: Dict[str, Any]) -> None:
+        """
+        Add a notification to the queue
+
+        Args:
+            notification: Notification object from AlarmProcessor
+        """
+        priority = self._priority_of(notification)
+        with self._lock:
+            self._queues.setdefault(priority, deque()).append((time.monotonic(), notification))
+            stats = self._stats.setdefault(priority, {
+                'enqueued': 0, 'dequeued': 0, 'total_wait': 0.0, 'max_wait': 0.0
+            })
+            stats['enqueued'] += 1
+
+    def get(self) -> Optional[Dict[str, Any]]:
+        """
+        Remove and return the next notification to send
+
+        Returns:
+            Notification object or None if the queue is empty
+        """
+        with self._lock:
+            now = time.monotonic()
+            best_priority = None
+            best_key = None
+
+            for priority, queue in self._queues.items():
+                if not queue:
+                    continue
+                enqueued_at = queue[0][0]
+                if priority == HIGH_PRIORITY:
+                    key = (0.0, enqueued_at)
+                else:
+                    # Aged priority never reaches HIGH
+                    aged = priority - (now - enqueued_at) / self.aging_seconds
+                    key = (max(aged, HIGH_PRIORITY + 0.5), enqueued_at)
+                if best_key is None or key < best_key:
+                    best_priority, best_key = priority, key
+
+            if best_priority is None:
+                return None
+
+            enqueued_at, notification = self._queues[best_priority].popleft()
+            wait = now - enqueued_at
+            stats = self._stats[best_priority]
+            stats['dequeued'] += 1
+            stats['total_wait'] += wait
+            stats['max_wait'] = max(stats['max_wait'], wait)
+            return notification
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def stats(self) -> Dict[int, Dict[str, Any]]:
+        """
+        Get per-priority queue depth and wait time statistics
+
+        Returns:
+            Dictionary keyed by priority with depth, counts and wait times in milliseconds
+        """
+        with self._lock:
+            now = time.monotonic()
+            result = {}
+            for priority, stats in sorted(self._stats.items()):
+                queue = self._queues.get(priority, ())
+                dequeued = stats['dequeued']
+                result[priority] = {
+                    'depth': len(queue),
+                    'enqueued': stats['enqueued'],
+                    'dequeued': dequeued,
+                    'avg_wait_ms': round(stats['total_wait'] / dequeued * 1000, 1) if dequeued else 0.0,
+                    'max_wait_ms': round(stats['max_wait'] * 1000, 1),
+                    'oldest_wait_ms': round((now - queue[0][0]) * 1000, 1) if queue else 0.0,
+                }
+            return result
+
+
+class NotificationScheduler:
+    """
+    Sends queued notifications through TNZClient in priority order
+    """
+
+    def __init__(self, queue: PriorityNotificationQueue, audit_log=None):
+        """
+        Initialize the scheduler
+
+        Args:
+            queue: Queue to drain
+            audit_log: NotificationAuditLog that queue decisions and send results are recorded in
+        """
+        self.queue = queue
+        self.audit_log = audit_log
+
+    def submit(self, notifications: List[Dict[str, Any]]) -> None:
+        """
+        Queue notifications for sending
+
+        Args:
+            notifications: Notification objects from AlarmProcessor
+        """
+        for notification in notifications:
+            self.queue.put(notification)
+            if self.audit_log is not None:
+                self.audit_log.record('queued', notification)
+
+    def drain(self, tnz_client) -> List[Tuple[Dict[str, Any], bool]]:
+        """
+        Send notifications until the queue is empty
+
+        The queue is consulted before every send, so a HIGH alarm queued by
+        another thread while draining is sent next.
+
+        Args:
+            tnz_client: Client used to send the SMS messages
+
+        Returns:
+            List of (notification, success) pairs sent by this call
+        """
+        results = []
+        while True:
+            notification = self.queue.get()
+            if notification is None:
+                break
+            started = time.perf_counter()
+            outcome = tnz_client.send_sms_result(
+                to=notification['recipient'],
+                message=notification['message']
+            )
+            latency_ms = round((time.perf_counter() - started) * 1000, 1)
+            result = outcome['success']
+            if result:
+                logger.info(f"SMS notification sent successfully to {notification['recipient']}")
+            else:
+                logger.error(f"Failed to send SMS notification to {notification['recipient']}")
+            if self.audit_log is not None:
+                self.audit_log.record(
+                    'sent' if result else 'failed',
+                    notification,
+                    message_id=outcome.get('message_id'),
+                    latency_ms=latency_ms,
+                    error=outcome.get('error')
+                )
+            results.append((notification, result))
+        return results
+
+
+# Process-wide scheduler shared by the web interface and the Azure Function
+_scheduler: Optional[NotificationScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> NotificationScheduler:
+    """
+    Get the process-wide notification scheduler
+
+    Returns:
+        NotificationScheduler instance
+    """
+    global _scheduler
+
+    with _scheduler_lock:
+        if _scheduler is None:
+            from notification_audit import get_audit_log
+
+            aging_seconds = float(os.environ.get('SEND_QUEUE_AGING_SECONDS', '60'))
+            _scheduler = NotificationScheduler(PriorityNotificationQueue(aging_seconds), get_audit_log())
+        return _scheduler
@@ -0,0 +1,122 @@
+import logging
+import os
+import threading
+from typing import Optional, Tuple
+
+from eds_sites import EDSFanoutPoller, load_eds_sites
+from tnz_client import TNZClient
+
+logger = logging.getLogger('shared_clients')
+
+# Process-wide client instances shared by every request handled in this worker
+_lock = threading.RLock()
+_recorder = None
+_eds_poller: Optional[EDSFanoutPoller] = None
+_eds_poller_config: Optional[str] = None
+_tnz_client: Optional[TNZClient] = None
+_tnz_config: Optional[Tuple[str, str]] = None
+
+
+def _http_timeout() -> float:
+    """
+    Get the per-request HTTP timeout for upstream APIs
+
+    Returns:
+        Timeout in seconds
+    """
+    try:
+        return float(os.environ.get('UPSTREAM_HTTP_TIMEOUT', '15'))
+    except ValueError:
+        return 15.0
+
+
+def _get_recorder():
+    """
+    Get the process-wide EDS recorder if EDS_RECORD_PATH is set
+
+    Returns:
+        EDSRecorder or None if recording is disabled
+    """
+    global _recorder
+
+    path = os.environ.get('EDS_RECORD_PATH')
+    if path and _recorder is None:
+        from eds_recording import EDSRecorder
+
+        _recorder = EDSRecorder(path)
+        logger.info(f"Recording EDS responses to {_recorder.path}")
+    return _recorder
+
+
+def get_eds_poller(default_client_type: str = 'web_interface') -> Optional[EDSFanoutPoller]:
+    """
+    Get the shared multi-site EDS poller, creating it if the site configuration changed
+
+    The poller keeps one logged in session per site that is reused across
+    requests and warm invocations.
+
+    Args:
+        default_client_type: Client type used when a site does not set one
+
+    Returns:
+        Shared EDSFanoutPoller or None if no EDS site is configured
+    """
+    global _eds_poller, _eds_poller_config
+
+    sites = load_eds_sites(default_client_type)
+    if not sites:
+        return None
+
+    config = repr(sites)
+    with _lock:
+        if _eds_poller is None or _eds_poller_config != config:
+            if _eds_poller is not None:
+                _eds_poller.close()
+            _eds_poller = EDSFanoutPoller(sites, timeout=_http_timeout())
+            recorder = _get_recorder()
+            for client in _eds_poller.clients.values():
+                client.recorder = recorder
+            _eds_poller_config = config
+        return _eds_poller
+
+
+def get_tnz_client() -> Optional[TNZClient]:
+    """
+    Get the shared TNZ client, creating it if the configuration changed
+
+    Returns:
+        Shared TNZ client or None if the TNZ API key is not configured
+    """
+    global _tnz_client, _tnz_config
+
+    config = (
+        os.environ.get('TNZ_API_BASE_URL', 'https://api.tnz.co.nz/api/v1'),
+        os.environ.get('TNZ_API_KEY', ''),
+    )
+    if not config[1]:
+        return None
+
+    with _lock:
+        if _tnz_client is None or _tnz_config != config:
+            _tnz_client = TNZClient(
+                base_url=config[0],
+                api_key=config[1],
+                timeout=_http_timeout()
+            )
+            _tnz_config = config
+        return _tnz_client
+
+
+def reset_clients() -> None:
+    """
+    Log out and drop the shared clients so they are rebuilt on next use
+    """
+    global _eds_poller, _eds_poller_config, _tnz_client, _tnz_config
+
+    with _lock:
+        if _eds_poller is not None:
+            _eds_poller.close()
+        _eds_poller = None
+        _eds_poller_config = None
+        _tnz_client = None
+        _tnz_config = None
@@ -0,0 +1,102 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+
+def profile_imports(module: str = 'function_app') -> List[Dict[str, Any]]:
+    """
+    Measure import times of a module and its dependencies in a fresh interpreter
+
+    Args:
+        module: Name of the module to import
+
+    Returns:
+        List of import records sorted by cumulative time, slowest first
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True,
+        text=True,
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+
+    records = []
+    for line in result.stderr.splitlines():
+        # Format: "import time:   self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            records.append({
+                'module': name.strip(),
+                'depth': max(len(name) - len(name.lstrip()) - 1, 0) // 2,
+                'self_ms': int(self_us) / 1000,
+                'cumulative_ms': int(cumulative_us) / 1000,
+            })
+        except ValueError:
+            continue
+
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed: {result.stderr.strip().splitlines()[-1:]}")
+
+    return sorted(records, key=lambda r: r['cumulative_ms'], reverse=True)
+
+
+def profile_startup() -> Dict[str, Any]:
+    """
+    Measure a simulated cold start and warm start of the function in this process
+
+    Returns:
+        Dictionary with import, first initialization and warm initialization times
+    """
+    started = time.perf_counter()
+    import function_app
+    import_ms = (time.perf_counter() - started) * 1000
+
+    # Build the clients without logging in so no network access is needed
+    started = time.perf_counter()
+    from shared_clients import get_eds_poller, get_tnz_client
+    get_eds_poller(default_client_type='azure_function')
+    get_tnz_client()
+    function_app._get_processor()
+    cold_init_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    get_eds_poller(default_client_type='azure_function')
+    get_tnz_client()
+    function_app._get_processor()
+    warm_init_ms = (time.perf_counter() - started) * 1000
+
+    return {
+        'function_app_import_ms': round(import_ms, 1),
+        'cold_clients_init_ms': round(cold_init_ms, 1),
+        'warm_clients_init_ms': round(warm_init_ms, 3),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import-time and startup profile of the Azure Function')
+    parser.add_argument('--module', default='function_app', help='Module to profile imports of')
+    parser.add_argument('--top', type=int, default=20, help='Number of slowest imports to show')
+    parser.add_argument('--json', dest='json_path', help='Also write the full report to this file')
+    args = parser.parse_args()
+
+    imports = profile_imports(args.module)
+    startup = profile_startup()
+
+    print(f"Slowest imports for {args.module}:")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for record in imports[:args.top]:
+        print(f"{record['cumulative_ms']:>14.1f} {record['self_ms']:>9.1f}  {'  ' * record['depth']}{record['module']}")
+
+    print("\nStartup:")
+    for key, value in startup.items():
+        print(f"  {key}: {value}")
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'imports': imports, 'startup': startup}, f, indent=2)
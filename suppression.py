@@ -0,0 +1,524 @@
+import bisect
+import fnmatch
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, tzinfo
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from contact_store import normalize_number
+
+logger = logging.getLogger('suppression')
+
+WINDOW_FIELDS = ('id', 'name', 'kind', 'start_at', 'end_at', 'zd', 'iess_pattern', 'contact',
+                 'min_priority', 'reason')
+WINDOW_KINDS = ('once', 'daily')
+SECONDS_PER_DAY = 86400
+
+
+class IntervalIndex:
+    """
+    Static index of half-open intervals [start, end) for stabbing queries
+
+    Intervals are sorted by start and covered by a binary tree holding the
+    largest end below each node. A query only descends into nodes that start
+    at or before the point and end after it, so finding the k intervals
+    containing a point takes O(log n + k).
+    """
+
+    def __init__(self, intervals: Iterable[Tuple[float, float, Any]]):
+        """
+        Build the index
+
+        Args:
+            intervals: (start, end, value) tuples; empty intervals are ignored
+        """
+        items = sorted((i for i in intervals if i[1] > i[0]), key=lambda i: i[0])
+        self._starts = [i[0] for i in items]
+        self._values = [i[2] for i in items]
+
+        self._size = 1
+        while self._size < len(items):
+            self._size *= 2
+        self._max_end = [float('-inf')] * (2 * self._size)
+        for position, item in enumerate(items):
+            self._max_end[self._size + position] = item[1]
+        for node in range(self._size - 1, 0, -1):
+            self._max_end[node] = max(self._max_end[2 * node], self._max_end[2 * node + 1])
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def query(self, point: float) -> List[Any]:
+        """
+        Find the intervals containing a point
+
+        Args:
+            point: Point to look up
+
+        Returns:
+            Values of all intervals with start <= point < end
+        """
+        # Only intervals starting at or before the point can contain it
+        limit = bisect.bisect_right(self._starts, point)
+        if limit == 0:
+            return []
+
+        results = []
+        stack = [(1, 0, self._size)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo >= limit or self._max_end[node] <= point:
+                continue
+            if hi - lo == 1:
+                results.append(self._values[lo])
+                continue
+            mid = (lo + hi) // 2
+            stack.append((2 * node + 1, mid, hi))
+            stack.append((2 * node, lo, mid))
+        return results
+
+
+def _parse_time_of_day(value: Any) -> float:
+    """
+    Parse an HH:MM time of day
+
+    Args:
+        value: Time as "HH:MM" or seconds since midnight
+
+    Returns:
+        Seconds since midnight
+
+    Raises:
+        ValueError: If the time is invalid
+    """
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        match = re.fullmatch(r'(\d{1,2}):(\d{2})', str(value).strip())
+        if not match or int(match.group(1)) > 24 or int(match.group(2)) > 59:
+            raise ValueError(f"Invalid time of day: {value}")
+        seconds = int(match.group(1)) * 3600 + int(match.group(2)) * 60
+    if not 0 <= seconds <= SECONDS_PER_DAY:
+        raise ValueError(f"Invalid time of day: {value}")
+    return seconds
+
+
+def _parse_timestamp(value: Any, tz: Optional[tzinfo] = None) -> float:
+    """
+    Parse an absolute time
+
+    Args:
+        value: Unix timestamp or ISO 8601 date and time
+        tz: Time zone of times without an offset (None for the server's local time)
+
+    Returns:
+        Unix timestamp
+
+    Raises:
+        ValueError: If the time is invalid
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        dt = datetime.fromisoformat(str(value).strip())
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid date and time: {value}")
+    if dt.tzinfo is None and tz is not None:
+        dt = dt.replace(tzinfo=tz)
+    return dt.timestamp()
+
+
+def _parse_priority(value: Any) -> int:
+    """
+    Parse a window's minimum priority number
+
+    Args:
+        value: Priority number as an integer or a string of digits
+
+    Returns:
+        Priority number
+
+    Raises:
+        ValueError: If the priority is not a positive whole number
+    """
+    if isinstance(value, int) and not isinstance(value, bool):
+        priority = value
+    elif isinstance(value, str) and value.strip().isdigit():
+        priority = int(value)
+    else:
+        raise ValueError(f"Invalid minimum priority: {value}")
+    if priority < 1:
+        raise ValueError(f"Invalid minimum priority: {value}")
+    return priority
+
+
+def load_timezone() -> Optional[tzinfo]:
+    """
+    Load the time zone daily windows are evaluated in from SUPPRESSION_TZ
+
+    Returns:
+        IANA time zone (e.g. "Pacific/Auckland"), or None for the server's
+        local time if SUPPRESSION_TZ is unset or unknown
+    """
+    name = os.environ.get('SUPPRESSION_TZ', '').strip()
+    if not name:
+        return None
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        logger.error(f"Unknown SUPPRESSION_TZ '{name}', using local time: {str(e)}")
+        return None
+
+
+class SuppressionIndex:
+    """
+    Immutable lookup structure over a set of suppression windows
+
+    One-off windows are indexed by Unix time and daily windows by time of
+    day in the store's time zone, with windows that cross midnight split in
+    two. Windows are partitioned by contact, so a lookup only visits the
+    windows of the contact it checks (or the global windows), however many
+    other contacts have quiet hours.
+    """
+
+    def __init__(self, windows: List[Dict[str, Any]], tz: Optional[tzinfo] = None):
+        """
+        Build the index
+
+        Args:
+            windows: Suppression windows from SuppressionStore.list_windows
+            tz: Time zone daily windows are evaluated in (None for the server's local time)
+        """
+        self.tz = tz
+        # contact (None for windows that apply to everyone) -> (once intervals, daily intervals)
+        partitions: Dict[Optional[str], Tuple[List, List]] = {}
+        for window in windows:
+            window = dict(window)
+            pattern = window.get('iess_pattern')
+            window['_iess_re'] = re.compile(fnmatch.translate(pattern)) if pattern else None
+            window['_zd'] = {z.strip() for z in window['zd'].split(',')} if window.get('zd') else None
+
+            once, daily = partitions.setdefault(window.get('contact'), ([], []))
+            if window['kind'] == 'daily':
+                if window['start_at'] <= window['end_at']:
+                    daily.append((window['start_at'], window['end_at'], window))
+                else:
+                    daily.append((window['start_at'], SECONDS_PER_DAY, window))
+                    daily.append((0, window['end_at'], window))
+            else:
+                once.append((window['start_at'], window['end_at'], window))
+
+        self._partitions: Dict[Optional[str], Tuple[IntervalIndex, IntervalIndex]] = {
+            contact: (IntervalIndex(once), IntervalIndex(daily))
+            for contact, (once, daily) in partitions.items()
+        }
+
+    def __len__(self) -> int:
+        return sum(len(once) + len(daily) for once, daily in self._partitions.values())
+
+    def match(self, alarm: Dict[str, Any], at: float, contact: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Find a window that suppresses an alarm
+
+        Args:
+            alarm: Alarm object from the EDS API
+            at: Time to check as a Unix timestamp
+            contact: E.164 number to check contact-scoped windows for; None
+                     checks windows that apply to every contact
+
+        Returns:
+            The first matching window or None
+        """
+        partition = self._partitions.get(contact)
+        if partition is None:
+            return None
+        once, daily = partition
+        dt = datetime.fromtimestamp(at, self.tz)
+        time_of_day = dt.hour * 3600 + dt.minute * 60 + dt.second
+        candidates = once.query(at) + daily.query(time_of_day)
+
+        priority = alarm.get('ap')
+        for window in candidates:
+            if window['_zd'] is not None and alarm.get('zd') not in window['_zd']:
+                continue
+            if window['_iess_re'] is not None and not window['_iess_re'].match(str(alarm.get('iess', ''))):
+                continue
+            if priority is not None and priority < window['min_priority']:
+                continue
+            return window
+        return None
+
+
+class SuppressionStore:
+    """
+    SQLite-backed maintenance windows and quiet hours, plus a log of suppressed alarms
+
+    A window is either a one-off period ("once", between two dates) or a
+    recurring daily period ("daily", between two times of day, which may
+    cross midnight). Windows can be limited to sources (zd), a point name
+    glob pattern (iess), a contact, and alarms of a minimum priority number.
+    """
+
+    def __init__(self, path: str, default_country_code: str = '64', cache_seconds: float = 30.0,
+                 retention_days: float = 30, tz: Optional[tzinfo] = None):
+        """
+        Initialize the suppression store
+
+        Args:
+            path: Path to the SQLite database file
+            default_country_code: Country calling code for national contact numbers
+            cache_seconds: How long the index may serve windows written by another process
+            retention_days: Days suppressed alarm records are kept for
+            tz: Time zone of daily windows and of one-off times without an offset
+                (None for the server's local time)
+        """
+        self.path = path
+        self.tz = tz
+        self.default_country_code = default_country_code
+        self.cache_seconds = cache_seconds
+        self.retention_days = retention_days
+        self._lock = threading.Lock()
+        self._index: Optional[SuppressionIndex] = None
+        self._index_loaded_at = 0.0
+
+        with self._connect() as conn:
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS suppression_windows ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " name TEXT NOT NULL,"
+                " kind TEXT NOT NULL,"
+                " start_at REAL NOT NULL,"
+                " end_at REAL NOT NULL,"
+                " zd TEXT,"
+                " iess_pattern TEXT,"
+                " contact TEXT,"
+                " min_priority INTEGER NOT NULL DEFAULT 1,"
+                " reason TEXT,"
+                " created_at REAL NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS idx_suppression_windows_end ON suppression_windows (kind, end_at);"
+                "CREATE TABLE IF NOT EXISTS suppressed_alarms ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " suppressed_at REAL NOT NULL,"
+                " window_id INTEGER,"
+                " window_name TEXT,"
+                " site TEXT,"
+                " sid INTEGER,"
+                " iess TEXT,"
+                " zd TEXT,"
+                " priority INTEGER,"
+                " alarm_ts REAL,"
+                " contact TEXT);"
+                "CREATE INDEX IF NOT EXISTS idx_suppressed_alarms_at ON suppressed_alarms (suppressed_at);"
+            )
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Open a connection that commits on success and is always closed
+        """
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _invalidate(self) -> None:
+        with self._lock:
+            self._index = None
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        return {field: row[field] for field in WINDOW_FIELDS}
+
+    def add_window(self, name: str, start: Any, end: Any, kind: str = 'once', zd: str = None,
+                   iess_pattern: str = None, contact: str = None, min_priority: int = 1,
+                   reason: str = None) -> Dict[str, Any]:
+        """
+        Add a suppression window
+
+        Args:
+            name: Window name
+            start: Start as a Unix timestamp or ISO date and time ("once"), or HH:MM ("daily");
+                   times without an offset are in the store's time zone
+            end: End in the same format as start
+            kind: "once" for a maintenance window, "daily" for recurring quiet hours
+            zd: Comma separated sources to suppress, None for all
+            iess_pattern: Glob pattern of point names to suppress (e.g. "NORTH.*"), None for all
+            contact: Only suppress notifications to this number, None for all contacts
+            min_priority: Only suppress alarms with this priority number or higher (2 lets HIGH alarms through)
+            reason: Optional free text
+
+        Returns:
+            The stored window
+
+        Raises:
+            ValueError: If a field is invalid
+        """
+        name = (name or '').strip()
+        if not name:
+            raise ValueError("Window name is required")
+        if kind not in WINDOW_KINDS:
+            raise ValueError(f"Window kind must be one of {', '.join(WINDOW_KINDS)}")
+
+        if kind == 'daily':
+            start, end = _parse_time_of_day(start), _parse_time_of_day(end)
+            if start == end:
+                raise ValueError("Daily window start and end must differ")
+        else:
+            start, end = _parse_timestamp(start, self.tz), _parse_timestamp(end, self.tz)
+            if end <= start:
+                raise ValueError("Window end must be after its start")
+
+        min_priority = _parse_priority(min_priority)
+        if contact:
+            contact = normalize_number(contact, self.default_country_code)
+
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT INTO suppression_windows "
+                "(name, kind, start_at, end_at, zd, iess_pattern, contact, min_priority, reason, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (name, kind, start, end, zd or None, iess_pattern or None, contact or None,
+                 min_priority, reason or None, time.time())
+            )
+            row = conn.execute("SELECT * FROM suppression_windows WHERE id = ?", (cursor.lastrowid,)).fetchone()
+        self._invalidate()
+        return self._to_dict(row)
+
+    def delete_window(self, window_id: int) -> bool:
+        """
+        Delete a suppression window
+
+        Args:
+            window_id: Window ID
+
+        Returns:
+            True if a window was deleted
+        """
+        with self._connect() as conn:
+            deleted = conn.execute("DELETE FROM suppression_windows WHERE id = ?", (window_id,)).rowcount
+        self._invalidate()
+        return deleted > 0
+
+    def list_windows(self, include_expired: bool = False) -> List[Dict[str, Any]]:
+        """
+        List suppression windows
+
+        Args:
+            include_expired: Also return one-off windows that have ended
+
+        Returns:
+            List of windows
+        """
+        query = "SELECT * FROM suppression_windows"
+        params: Tuple = ()
+        if not include_expired:
+            query += " WHERE kind = 'daily' OR end_at > ?"
+            params = (time.time(),)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY kind, start_at", params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    def index(self) -> SuppressionIndex:
+        """
+        Get the index of current windows, rebuilding it after writes or when stale
+
+        Returns:
+            SuppressionIndex over windows that have not ended
+        """
+        with self._lock:
+            fresh = time.monotonic() - self._index_loaded_at < self.cache_seconds
+            if self._index is not None and fresh:
+                return self._index
+
+        index = SuppressionIndex(self.list_windows(), self.tz)
+        with self._lock:
+            self._index = index
+            self._index_loaded_at = time.monotonic()
+        return index
+
+    def record_suppressed(self, records: List[Dict[str, Any]]) -> None:
+        """
+        Record suppressed alarms for later review and drop records past retention
+
+        Args:
+            records: Dictionaries with window, alarm and optional contact keys
+        """
+        if not records:
+            return
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT INTO suppressed_alarms "
+                    "(suppressed_at, window_id, window_name, site, sid, iess, zd, priority, alarm_ts, contact) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (now, r['window']['id'], r['window']['name'], r['alarm'].get('site'),
+                         r['alarm'].get('sid'), r['alarm'].get('iess'), r['alarm'].get('zd'),
+                         r['alarm'].get('ap'), r['alarm'].get('ts'), r.get('contact'))
+                        for r in records
+                    ]
+                )
+                conn.execute("DELETE FROM suppressed_alarms WHERE suppressed_at < ?",
+                             (now - self.retention_days * SECONDS_PER_DAY,))
+        except sqlite3.Error as e:
+            logger.error(f"Error recording suppressed alarms: {str(e)}")
+
+    def list_suppressed(self, since: float = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        List recorded suppressed alarms, newest first
+
+        Args:
+            since: Only return records after this Unix timestamp
+            limit: Maximum number of records
+
+        Returns:
+            List of suppressed alarm records
+        """
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM suppressed_alarms WHERE suppressed_at >= ? ORDER BY suppressed_at DESC, id DESC LIMIT ?",
+                (since or 0, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+_store: Optional[SuppressionStore] = None
+_store_lock = threading.Lock()
+
+
+def get_suppression_store() -> Optional[SuppressionStore]:
+    """
+    Get the process-wide suppression store
+
+    The database is SUPPRESSION_DB_PATH (default suppression.db) and daily
+    windows use SUPPRESSION_TZ (see load_timezone).
+
+    Returns:
+        SuppressionStore or None if the database cannot be opened
+    """
+    global _store
+
+    with _store_lock:
+        if _store is None:
+            try:
+                _store = SuppressionStore(
+                    os.environ.get('SUPPRESSION_DB_PATH', 'suppression.db'),
+                    default_country_code=os.environ.get('DEFAULT_COUNTRY_CODE', '64'),
+                    cache_seconds=float(os.environ.get('SUPPRESSION_CACHE_SECONDS', '30')),
+                    retention_days=float(os.environ.get('SUPPRESSION_LOG_DAYS', '30')),
+                    tz=load_timezone()
+                )
+            except sqlite3.Error as e:
+                logger.error(f"Error opening suppression store: {str(e)}")
+                return None
+        return _store
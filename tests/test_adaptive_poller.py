@@ -0,0 +1,30 @@
+from adaptive_poller import AdaptivePollScheduler
+
+
+def test_window_reaches_back_to_last_successful_poll_after_a_failure():
+    scheduler = AdaptivePollScheduler(overlap_seconds=60)
+    t = 1_000_000.0
+    scheduler.record(0, error=False, now=t)
+    scheduler.record(0, error=True, now=t + 120)
+
+    # 240s since the last success plus 60s overlap
+    assert scheduler.window_minutes(t + 240) == 5
+    assert scheduler.last_poll_at == t + 120
+
+
+def test_window_after_success_covers_only_time_since_that_poll():
+    scheduler = AdaptivePollScheduler(overlap_seconds=60)
+    t = 1_000_000.0
+    scheduler.record(0, error=True, now=t)
+    scheduler.record(0, error=False, now=t + 120)
+
+    assert scheduler.window_minutes(t + 240) == 3
+
+
+def test_window_keeps_initial_coverage_while_every_poll_fails():
+    scheduler = AdaptivePollScheduler(overlap_seconds=60, initial_window_minutes=15)
+    t = 1_000_000.0
+    assert scheduler.window_minutes(t) == 15
+    scheduler.record(0, error=True, now=t)
+
+    assert scheduler.window_minutes(t + 300) == 21
@@ -0,0 +1,54 @@
+from alarm_processor import AlarmProcessor
+from contact_store import ContactStore
+from notification_audit import NotificationAuditLog
+from suppression import SuppressionStore
+
+
+def _processor(tmp_path, **kwargs):
+    contacts = ContactStore(str(tmp_path / 'contacts.db'))
+    contacts.add_contact('Ops', '+6421000000')
+    return AlarmProcessor(contact_store=contacts,
+                          suppression_store=SuppressionStore(str(tmp_path / 'suppression.db')),
+                          audit_log=NotificationAuditLog(str(tmp_path / 'audit_log')), **kwargs)
+
+
+def test_active_alarm_with_advancing_ts_is_notified_once(tmp_path):
+    processor = _processor(tmp_path, renotify_minutes=60)
+    t = 1_700_000_000.0
+    notified = 0
+    for poll in range(5):
+        # EDS moves ts on every value update while the point stays in alarm
+        alarm = {'sid': 7, 'ap': 1, 'ts': t + poll * 60 - 5, 'value': 90 + poll, 'site': 'north'}
+        notified += len(processor.process_alarms([alarm], now=t + poll * 60))
+
+    assert notified == 1
+
+
+def test_priority_change_and_cooldown_notify_again(tmp_path):
+    processor = _processor(tmp_path, renotify_minutes=60)
+    t = 1_700_000_000.0
+
+    assert processor.process_alarms([{'sid': 7, 'ap': 2, 'ts': t, 'site': 'north'}], now=t)
+    assert processor.process_alarms([{'sid': 7, 'ap': 1, 'ts': t + 60, 'site': 'north'}], now=t + 60)
+    assert not processor.process_alarms([{'sid': 7, 'ap': 1, 'ts': t + 120, 'site': 'north'}], now=t + 120)
+    assert processor.process_alarms([{'sid': 7, 'ap': 1, 'ts': t + 3700, 'site': 'north'}], now=t + 3700)
+
+
+def test_equal_sids_on_different_sites_are_separate_alarms(tmp_path):
+    processor = _processor(tmp_path)
+    t = 1_700_000_000.0
+    alarms = [{'sid': 7, 'ap': 1, 'ts': t, 'site': 'north'}, {'sid': 7, 'ap': 1, 'ts': t, 'site': 'south'}]
+
+    assert len(processor.process_alarms(alarms, now=t)) == 2
+
+
+def test_count_new_counts_unseen_alarms_not_notifications(tmp_path):
+    processor = _processor(tmp_path)
+    processor.contact_store.add_contact('Standby', '+6421000001')
+    t = 1_700_000_000.0
+    alarms = [{'sid': 7, 'ap': 1, 'ts': t, 'site': 'north'}, {'sid': 7, 'ap': 1, 'ts': t, 'site': 'south'},
+              {'sid': 7, 'ap': 1, 'ts': t + 5, 'site': 'south'}]
+
+    assert processor.count_new(alarms, now=t) == 2
+    assert len(processor.process_alarms(alarms, now=t)) == 4
+    assert processor.count_new(alarms, now=t + 60) == 0
@@ -0,0 +1,46 @@
+import importlib
+
+import pytest
+
+from coordination import ShardCoordinator, SQLiteLeaseBackend
+
+
+class StubPoller:
+    last_error = None
+    site_status = {}
+
+    def query_alarms(self, **kwargs):
+        return [{'sid': 1, 'ap': 1, 'ts': 1_700_000_000, 'site': 'north'}]
+
+
+class StubTNZ:
+    def send_sms_result(self, to, message, **kwargs):
+        return {'success': True, 'message_id': 'stub', 'error': None}
+
+
+@pytest.fixture
+def web(tmp_path, monkeypatch):
+    # Keep main.py away from the checkout's local.settings.json and databases
+    monkeypatch.chdir(tmp_path)
+    for name in ('COORDINATION_BACKEND', 'CANARY_INTERVAL_SECONDS', 'TRACE_EXPORT_PATH', 'CONTACT_LIST'):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv('AUDIT_LOG_DIR', '')
+    main = importlib.import_module('main')
+
+    backend = SQLiteLeaseBackend(str(tmp_path / 'coordination.db'))
+    monkeypatch.setattr(main, 'coordinator', ShardCoordinator(backend, [{'name': 'all'}], owner='web'))
+    monkeypatch.setattr(main, 'get_eds_poller', lambda: StubPoller())
+    monkeypatch.setattr(main, 'get_tnz_client', lambda: StubTNZ())
+    return main.app.test_client(), backend
+
+
+@pytest.mark.parametrize('send_sms', [False, True])
+def test_manual_check_leaves_shard_leases_free(web, send_sms):
+    client, backend = web
+
+    response = client.post('/api/check-alarms', json={'send_sms': send_sms})
+
+    assert response.status_code == 200
+    assert response.get_json()['success'] is True
+    # The timer poller of another instance can still take the shard
+    assert backend.try_acquire('shard-all', 'function-instance', 600)
@@ -0,0 +1,72 @@
+import gzip
+import os
+import time
+
+import json_codec
+from alarm_processor import AlarmProcessor
+from contact_store import ContactStore
+from eds_recording import EDSReplayer, StubTNZClient, create_replay_processor
+from notification_audit import NotificationAuditLog
+from suppression import SuppressionStore
+
+
+def _write_recording(path, polls):
+    with open(path, 'wb') as f:
+        for ts, points in polls:
+            entry = {'ts': ts, 'endpoint': 'points/query', 'request': {}, 'response': {'points': points}}
+            f.write(gzip.compress(json_codec.dumps(entry) + b'\n'))
+
+
+def _processor(tmp_path):
+    contacts = ContactStore(str(tmp_path / 'contacts.db'))
+    contacts.add_contact('Ops', '+6421000000')
+    return AlarmProcessor(
+        contact_store=contacts,
+        suppression_store=SuppressionStore(str(tmp_path / 'suppression.db')),
+        audit_log=NotificationAuditLog(str(tmp_path / 'audit_log'))
+    )
+
+
+def test_replay_of_old_recording_notifies_unchanged_alarm_once(tmp_path):
+    recorded_at = time.time() - 3 * 86400
+    alarm = {'sid': 7, 'ap': 1, 'ts': recorded_at - 30, 'iess': 'NORTH.PUMP1', 'site': 'north'}
+    path = os.path.join(tmp_path, 'eds.jsonl.gz')
+    _write_recording(path, [(recorded_at + i * 60, [dict(alarm)]) for i in range(5)])
+
+    tnz = StubTNZClient()
+    stats = EDSReplayer(path, speed=0).replay(_processor(tmp_path), tnz)
+
+    assert stats['polls'] == 5
+    assert stats['notifications'] == 1
+    assert len(tnz.sent) == 1
+
+
+def test_replay_keeps_sites_apart(tmp_path):
+    recorded_at = time.time() - 3600
+    path = os.path.join(tmp_path, 'eds.jsonl.gz')
+    with open(path, 'wb') as f:
+        for offset, site in enumerate(('north', 'south')):
+            entry = {'ts': recorded_at + offset, 'endpoint': 'points/query', 'site': site,
+                     'request': {}, 'response': {'points': [{'sid': 7, 'ap': 1, 'ts': recorded_at - 30}]}}
+            f.write(gzip.compress(json_codec.dumps(entry) + b'\n'))
+
+    tnz = StubTNZClient()
+    EDSReplayer(path, speed=0).replay(_processor(tmp_path), tnz)
+
+    assert len(tnz.sent) == 2
+    assert {m['message'].rsplit('Site: ', 1)[1] for m in tnz.sent} == {'north', 'south'}
+
+
+def test_replay_processor_uses_a_copy_of_the_contacts(tmp_path, monkeypatch):
+    production = tmp_path / 'production-contacts.db'
+    ContactStore(str(production)).add_contact('Ops', '+6421000000')
+    monkeypatch.setenv('CONTACT_DB_PATH', str(production))
+    monkeypatch.setenv('SUPPRESSION_DB_PATH', str(tmp_path / 'missing-suppression.db'))
+    before = production.read_bytes()
+
+    processor = create_replay_processor(str(tmp_path / 'replay'))
+    processor.contact_store.add_contact('Replay only', '+6421999999')
+
+    assert processor.contact_store.path == str(tmp_path / 'replay' / 'contacts.db')
+    assert [c['number'] for c in processor.contacts] == ['+6421000000', '+6421999999']
+    assert production.read_bytes() == before
@@ -0,0 +1,30 @@
+from datetime import timezone
+
+from suppression import SuppressionIndex
+
+
+def _window(window_id, contact=None, kind='daily', start=0, end=3600):
+    return {'id': window_id, 'name': f"w{window_id}", 'kind': kind, 'start_at': start, 'end_at': end,
+            'zd': None, 'iess_pattern': None, 'contact': contact, 'min_priority': 1, 'reason': None}
+
+
+def test_contact_windows_only_apply_to_their_contact():
+    windows = [_window(i, contact=f"+64210000{i:04d}") for i in range(2000)]
+    windows.append(_window(9999, kind='once', start=1000, end=2000))
+    index = SuppressionIndex(windows, timezone.utc)
+    alarm = {'sid': 1, 'ap': 2}
+
+    assert len(index) == 2001
+    assert index.match(alarm, 1500)['id'] == 9999
+    assert index.match(alarm, 5000) is None
+    assert index.match(alarm, 60, '+642100000042')['id'] == 42
+    assert index.match(alarm, 60, '+640000000000') is None
+
+
+def test_contact_lookup_only_visits_that_contacts_windows():
+    windows = [_window(i, contact='+6421000001') for i in range(3)]
+    windows += [_window(100 + i, contact=f"+6422{i:07d}") for i in range(500)]
+    index = SuppressionIndex(windows, timezone.utc)
+
+    once, daily = index._partitions['+6421000001']
+    assert len(once) + len(daily) == 3
@@ -0,0 +1,20 @@
+import threading
+
+from tracing import profiled
+
+
+def test_overlapping_profiles_run_the_second_unprofiled(tmp_path, monkeypatch):
+    monkeypatch.setenv('PROFILE_OUTPUT_DIR', str(tmp_path))
+    monkeypatch.setenv('PROFILER', 'cprofile')
+    inner = []
+
+    with profiled('outer') as outer:
+        thread = threading.Thread(target=lambda: inner.append(profiled('inner').__enter__()))
+        thread.start()
+        thread.join()
+
+    assert outer.endswith('.prof')
+    assert inner == [None]
+    with profiled('after') as after:
+        pass
+    assert after.endswith('.prof')
@@ -1,7 +1,10 @@
 import requests
 import logging
-import json
-from typing import Dict, List, Optional, Any
+from typing import Dict, Optional, Any
+
+import json_codec
+from http_transport import get_session
+from tracing import annotate, traced
 
 logger = logging.getLogger('tnz_client')
 
@@ -10,23 +13,26 @@ class TNZClient:
     Client for interacting with the TNZ SMS API
     """
     
-    def __init__(self, base_url: str, api_key: str):
+    def __init__(self, base_url: str, api_key: str, timeout: float = 30.0):
         """
         Initialize the TNZ API client
         
         Args:
             base_url: Base URL for the TNZ API
             api_key: API key for authentication
+            timeout: Timeout in seconds for each HTTP request
         """
         self.base_url = base_url.rstrip('/')
         self.api_key = api_key
-        self.session = requests.Session()
+        self.timeout = timeout
+        # Own session over the connection pool shared with other clients of this host
+        self.session = get_session(self.base_url)
         
-        # Set up default headers
-        self.session.headers.update({
+        # Headers sent with every request (request bodies are encoded by json_codec)
+        self.headers = {
             'Content-Type': 'application/json',
             'Authorization': f'Basic {self.api_key}'
-        })
+        }
     
     def send_sms(self, to: str, message: str, sender_id: str = None, 
                  reference: str = None, validate_only: bool = False) -> bool:
@@ -43,6 +49,24 @@ class TNZClient:
         Returns:
             True if SMS was sent successfully, False otherwise
         """
+        return self.send_sms_result(to, message, sender_id, reference, validate_only)['success']
+    
+    @traced('tnz.send_sms')
+    def send_sms_result(self, to: str, message: str, sender_id: str = None,
+                        reference: str = None, validate_only: bool = False) -> Dict[str, Any]:
+        """
+        Send an SMS via the TNZ API and return the outcome
+        
+        Args:
+            to: Recipient phone number
+            message: SMS message content
+            sender_id: Optional sender ID
+            reference: Optional reference for tracking
+            validate_only: If True, only validate the request without sending
+            
+        Returns:
+            Dictionary with success, message_id and error (None when sent)
+        """
         try:
             url = f"{self.base_url}/sms/send"
             
@@ -60,26 +84,27 @@ class TNZClient:
             if reference:
                 payload["Reference"] = reference
             
-            response = self.session.post(url, json=payload)
+            response = self.session.post(url, data=json_codec.dumps(payload), headers=self.headers, timeout=self.timeout)
             response.raise_for_status()
             
-            data = response.json()
+            data = json_codec.loads(response.content)
             result = data.get('Result', {})
             
             # Check if the SMS was sent successfully
             if result.get('Success', False):
                 message_id = result.get('MessageId')
                 logger.info(f"SMS sent successfully. Message ID: {message_id}")
-                return True
+                annotate(message_id=message_id, validate_only=validate_only)
+                return {'success': True, 'message_id': message_id, 'error': None}
             else:
                 errors = result.get('Errors', [])
                 error_msg = '; '.join(errors) if errors else 'Unknown error'
                 logger.error(f"Failed to send SMS: {error_msg}")
-                return False
+                return {'success': False, 'message_id': None, 'error': error_msg}
                 
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:
             logger.error(f"Error sending SMS: {str(e)}")
-            return False
+            return {'success': False, 'message_id': None, 'error': str(e)}
     
     def check_message_status(self, message_id: str) -> Optional[Dict[str, Any]]:
         """
@@ -94,10 +119,10 @@ class TNZClient:
         try:
             url = f"{self.base_url}/sms/status/{message_id}"
             
-            response = self.session.get(url)
+            response = self.session.get(url, headers=self.headers, timeout=self.timeout)
             response.raise_for_status()
             
-            data = response.json()
+            data = json_codec.loads(response.content)
             result = data.get('Result', {})
             
             if result.get('Success', False):
@@ -109,6 +134,6 @@ class TNZClient:
                 logger.error(f"Failed to get message status: {error_msg}")
                 return None
                 
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:
             logger.error(f"Error checking message status: {str(e)}")
             return None
@@ -0,0 +1,334 @@
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger('tracing')
+
+# Span active in the current context; None outside a trace, which makes
+# every span() call a no-op
+_current_span: contextvars.ContextVar = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    """
+    One timed stage of a trace
+    """
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'start', 'duration_ms',
+                 'attributes', 'error', 'spans', '_started')
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], spans: List['Span'],
+                 attributes: Dict[str, Any]):
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time()
+        self.duration_ms: Optional[float] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+        # Finished spans of the whole trace, shared by every span in it
+        self.spans = spans
+        self._started = time.perf_counter()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'start': self.start,
+            'duration_ms': self.duration_ms,
+            'status': 'error' if self.error else 'ok',
+            'error': self.error,
+            'attributes': self.attributes,
+        }
+
+
+class JSONLExporter:
+    """
+    Appends finished traces to a JSON lines file, one span per line
+
+    When the file reaches max_bytes it is renamed to "<path>.1", replacing
+    the previous one, so at most two files are kept.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 50 * 1024 * 1024):
+        """
+        Initialize the exporter
+
+        Args:
+            path: File to append spans to
+            max_bytes: Size at which the file is rotated; 0 never rotates
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        """
+        Write the spans of one trace
+
+        Args:
+            spans: Finished spans
+        """
+        import json_codec
+
+        data = b''.join(json_codec.dumps(s.to_dict()) + b'\n' for s in spans)
+        try:
+            with self._lock:
+                if self.max_bytes and os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                    os.replace(self.path, f"{self.path}.1")
+                with open(self.path, 'ab') as f:
+                    f.write(data)
+        except OSError as e:
+            logger.error(f"Error exporting trace: {str(e)}")
+
+
+_enabled = os.environ.get('TRACING_ENABLED', 'true').lower() == 'true'
+# Traces at least this long are summarised at INFO level, others at DEBUG
+_slow_ms = float(os.environ.get('TRACE_SLOW_MS', '1000'))
+# Export is opt-in: traces are only written to disk when TRACE_EXPORT_PATH is set
+_exporter: Optional[JSONLExporter] = None
+if _enabled and os.environ.get('TRACE_EXPORT_PATH'):
+    _exporter = JSONLExporter(os.environ['TRACE_EXPORT_PATH'],
+                              max_bytes=int(os.environ.get('TRACE_EXPORT_MAX_BYTES', str(50 * 1024 * 1024))))
+
+
+def _finish_trace(root: Span) -> None:
+    # Direct children of the root are the stages worth summarising
+    stages = ', '.join(
+        f"{s.name}={s.duration_ms:.0f}ms" for s in root.spans if s.parent_id == root.span_id
+    )
+    level = logging.INFO if root.duration_ms >= _slow_ms else logging.DEBUG
+    logger.log(level, f"Trace {root.name} {root.trace_id} took {root.duration_ms:.0f}ms ({stages})")
+    if _exporter is not None:
+        _exporter.export(root.spans)
+
+
+@contextmanager
+def span(name: str, root: bool = False, **attributes) -> Iterator[Optional[Span]]:
+    """
+    Time a block of code as a span of the current trace
+
+    Outside a trace this does nothing unless root is True, in which case a
+    new trace is started and exported when the block ends.
+
+    Args:
+        name: Span name, e.g. "eds.query_alarms"
+        root: Start a new trace if there is none
+        **attributes: Attributes recorded with the span
+
+    Returns:
+        Context manager yielding the Span, or None when not tracing
+    """
+    parent = _current_span.get()
+    if not _enabled or (parent is None and not root):
+        yield None
+        return
+
+    if parent is None:
+        current = Span(name, os.urandom(16).hex(), None, [], attributes)
+    else:
+        current = Span(name, parent.trace_id, parent.span_id, parent.spans, attributes)
+
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {str(e)}"
+        raise
+    finally:
+        current.duration_ms = round((time.perf_counter() - current._started) * 1000, 3)
+        _current_span.reset(token)
+        current.spans.append(current)
+        if parent is None:
+            _finish_trace(current)
+
+
+def annotate(**attributes) -> None:
+    """
+    Add attributes to the current span, if any
+
+    Args:
+        **attributes: Attributes to record
+    """
+    current = _current_span.get()
+    if current is not None:
+        current.attributes.update(attributes)
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorator that runs a function inside a span of the current trace
+
+    Args:
+        name: Span name
+
+    Returns:
+        Decorator
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def run_in_context(func: Callable) -> Callable:
+    """
+    Bind a function to the current context so spans it opens in another
+    thread (e.g. a ThreadPoolExecutor worker) join the current trace
+
+    Args:
+        func: Function to bind
+
+    Returns:
+        Function that runs in a copy of the current context
+    """
+    context = contextvars.copy_context()
+    return functools.partial(context.run, func)
+
+
+# cProfile (from Python 3.12) and pyinstrument allow only one active profiler
+# per process, so concurrent profiled blocks run unprofiled instead
+_profiler_lock = threading.Lock()
+
+
+@contextmanager
+def profiled(name: str, enabled: bool = True) -> Iterator[Optional[str]]:
+    """
+    Run a block under a profiler and save the output
+
+    Uses pyinstrument (a sampling profiler) when PROFILER is "pyinstrument"
+    and it is installed, otherwise cProfile. Output goes to PROFILE_OUTPUT_DIR
+    (default profiles): an HTML report for pyinstrument, or a .prof file
+    (open with pstats or snakeviz) and a text summary for cProfile.
+
+    Only one block is profiled at a time. If another profile is already
+    running, the block runs unprofiled.
+
+    Args:
+        name: Name used in the output file name
+        enabled: Profile only if True, so callers can pass their toggle directly
+
+    Returns:
+        Context manager yielding the output path, or None when not profiling
+    """
+    if not enabled:
+        yield None
+        return
+
+    if not _profiler_lock.acquire(blocking=False):
+        logger.warning(f"Another profile is running, not profiling {name}")
+        yield None
+        return
+
+    try:
+        with _profile(name) as path:
+            yield path
+    finally:
+        _profiler_lock.release()
+
+
+@contextmanager
+def _profile(name: str) -> Iterator[str]:
+    directory = os.environ.get('PROFILE_OUTPUT_DIR', 'profiles')
+    os.makedirs(directory, exist_ok=True)
+    stem = os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+
+    sampler = None
+    if os.environ.get('PROFILER', 'cprofile').lower() == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+
+            sampler = Profiler()
+        except ImportError:
+            logger.warning("pyinstrument is not installed, falling back to cProfile")
+
+    if sampler is not None:
+        path = f"{stem}.html"
+        sampler.start()
+        try:
+            yield path
+        finally:
+            sampler.stop()
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(sampler.output_html())
+            logger.info(f"Saved profile to {path}")
+        return
+
+    import cProfile
+    import pstats
+
+    path = f"{stem}.prof"
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield path
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        with open(f"{stem}.txt", 'w', encoding='utf-8') as f:
+            pstats.Stats(profiler, stream=f).sort_stats('cumulative').print_stats(40)
+        logger.info(f"Saved profile to {path}")
+
+
+def summarize_traces(path: str) -> Dict[str, Dict[str, float]]:
+    """
+    Aggregate span durations from a JSON lines trace file
+
+    Args:
+        path: Trace file written by JSONLExporter
+
+    Returns:
+        Dictionary of span name to count, errors and mean/p95/max duration in milliseconds
+    """
+    import json_codec
+
+    durations: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    with open(path, 'rb') as f:
+        for line in f:
+            try:
+                record = json_codec.loads(line)
+            except ValueError:
+                continue
+            durations.setdefault(record['name'], []).append(record['duration_ms'])
+            if record.get('status') == 'error':
+                errors[record['name']] = errors.get(record['name'], 0) + 1
+
+    summary = {}
+    for name, values in durations.items():
+        values.sort()
+        summary[name] = {
+            'count': len(values),
+            'errors': errors.get(name, 0),
+            'mean_ms': sum(values) / len(values),
+            'p95_ms': values[max(int(len(values) * 0.95 + 0.5) - 1, 0)],
+            'max_ms': values[-1],
+        }
+    return summary
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Summarise span durations from a trace file')
+    parser.add_argument('path', nargs='?', default=os.environ.get('TRACE_EXPORT_PATH') or 'traces.jsonl')
+    args = parser.parse_args()
+
+    results = summarize_traces(args.path)
+    print(f"{'span':<30} {'count':>7} {'errors':>7} {'mean ms':>10} {'p95 ms':>10} {'max ms':>10}")
+    for name, stats in sorted(results.items(), key=lambda item: item[1]['mean_ms'] * item[1]['count'], reverse=True):
+        print(f"{name:<30} {stats['count']:>7} {stats['errors']:>7} {stats['mean_ms']:>10.1f} "
+              f"{stats['p95_ms']:>10.1f} {stats['max_ms']:>10.1f}")